@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""Time loading, saving, mutating, view building and drawing on synthetic task files.
+
+Results are written as JSON so runs from different commits can be compared:
+
+    python benchmark.py --sizes 1000 100000 --output before.json
+    python benchmark.py --sizes 1000 100000 --compare before.json
+"""
+import argparse
+import curses
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+from task_model import Priority, TaskManager, TaskStatus
+from task_storage import open_storage
+from task_transfer import import_records, read_records, write_records
+from task_tui import SortMode, TaskTUI
+
+WORDS = [
+    "buy", "groceries", "week", "complete", "project", "documentation", "fix", "bug", "login",
+    "page", "call", "dentist", "review", "pull", "request", "plan", "trip", "write", "report",
+    "update", "resume", "clean", "garage", "read", "book", "pay", "bills", "schedule", "meeting",
+]
+
+FILTERS = [None, TaskStatus.TODO, TaskStatus.DONE]
+
+
+def generate_tasks(count: int, seed: int = 0) -> List[Dict]:
+    """``count`` task dicts shaped like example-tasks.json, the same for the same seed"""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    tasks = []
+    for _ in range(count):
+        created = start + timedelta(seconds=rng.randrange(5 * 365 * 86400))
+        tasks.append({
+            "id": "%032x" % rng.getrandbits(128),
+            "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).capitalize(),
+            "creation_date": created.isoformat(),
+            "priority": rng.choice(list(Priority)).name,
+            "status": TaskStatus.DONE.name if rng.random() < 0.3 else TaskStatus.TODO.name,
+        })
+    return tasks
+
+
+class FakeScreen:
+    """An in-memory stand-in for a curses window, so drawing can be timed headless"""
+
+    def __init__(self, lines: int = 50, cols: int = 120):
+        self.lines = lines
+        self.cols = cols
+        self.cells = [[" "] * cols for _ in range(lines)]
+        self.y = 0
+        self.x = 0
+
+    def getmaxyx(self):
+        return (self.lines, self.cols)
+
+    def keypad(self, flag: bool) -> None:
+        pass
+
+    def nodelay(self, flag: bool) -> None:
+        pass
+
+    def getch(self) -> int:
+        return -1
+
+    def clear(self) -> None:
+        self.cells = [[" "] * self.cols for _ in range(self.lines)]
+
+    def move(self, y: int, x: int) -> None:
+        self.y = y
+        self.x = x
+
+    def clrtoeol(self) -> None:
+        row = self.cells[self.y]
+        row[self.x:] = [" "] * (self.cols - self.x)
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0) -> None:
+        row = self.cells[y]
+        text = text[:self.cols - x]
+        row[x:x + len(text)] = text
+
+    def refresh(self) -> None:
+        pass
+
+    def noutrefresh(self) -> None:
+        pass
+
+
+@contextmanager
+def fake_curses(lines: int, cols: int) -> Iterator[None]:
+    """Replace the curses calls that need a real terminal with no-ops"""
+    names = ["start_color", "use_default_colors", "init_pair", "curs_set", "doupdate", "color_pair"]
+    saved = {name: getattr(curses, name) for name in names}
+    saved_size = (getattr(curses, "LINES", None), getattr(curses, "COLS", None))
+    for name in names:
+        setattr(curses, name, lambda *args: 0)
+    curses.LINES, curses.COLS = lines, cols
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(curses, name, value)
+        curses.LINES, curses.COLS = saved_size
+
+
+def measure(func: Callable[[], None], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict:
+    """Run ``func`` ``repeat`` times, calling ``setup`` untimed before each run"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+    }
+
+
+class Benchmark:
+    def __init__(self, workdir: str, backend: str, journal: bool, repeat: int, lines: int, cols: int):
+        self.workdir = workdir
+        self.backend = backend
+        self.journal = journal
+        self.repeat = repeat
+        self.lines = lines
+        self.cols = cols
+        self.results: List[Dict] = []
+
+    def record(self, name: str, size: int, timing: Dict) -> None:
+        result = {"name": name, "size": size}
+        result.update(timing)
+        self.results.append(result)
+        print(f"{name:<40} {size:>9} {timing['median'] * 1000:>12.3f} ms", file=sys.stderr)
+
+    def data_path(self, size: int) -> str:
+        extension = ".db" if self.backend == "sqlite" else ".json"
+        return os.path.join(self.workdir, f"tasks-{size}{extension}")
+
+    def open_manager(self, path: str) -> TaskManager:
+        storage = open_storage(path, backend=self.backend, journal=self.journal)
+        return TaskManager(path, storage=storage)
+
+    def prepare(self, size: int) -> str:
+        """Write a synthetic task file of ``size`` tasks in the benchmarked format"""
+        json_path = os.path.join(self.workdir, f"tasks-{size}.json")
+        with open(json_path, "w") as f:
+            json.dump(generate_tasks(size), f, indent=2)
+        path = self.data_path(size)
+        if path != json_path:
+            # Import through the JSON backend, then save everything in the target format
+            manager = TaskManager(json_path)
+            target = open_storage(path, backend=self.backend)
+            target.save(manager.tasks)
+            target.close()
+            manager.close()
+        return path
+
+    def run(self, size: int) -> None:
+        path = self.prepare(size)
+        manager = self.open_manager(path)
+        repeat = self.repeat
+        # Loads, saves and mutators rewrite whole files on some backends, so large sizes get fewer runs
+        slow_repeat = max(1, min(repeat, 100000 // size))
+
+        self.record("load_tasks", size, measure(manager.load_tasks, slow_repeat))
+        self.record("save_tasks", size, measure(manager.save_tasks, slow_repeat))
+
+        rng = random.Random(size)
+        ids = [task.id for task in manager.tasks]
+
+        def pick() -> str:
+            return rng.choice(ids)
+
+        self.record("add_task", size, measure(
+            lambda: manager.add_task("Benchmark task", Priority.MEDIUM), slow_repeat))
+        self.record("toggle_task_status_by_id", size, measure(
+            lambda: manager.toggle_task_status_by_id(pick()), slow_repeat))
+        self.record("update_task_title_by_id", size, measure(
+            lambda: manager.update_task_title_by_id(pick(), "Renamed benchmark task"), slow_repeat))
+        self.record("update_task_priority_by_id", size, measure(
+            lambda: manager.update_task_priority_by_id(pick(), Priority.HIGH), slow_repeat))
+        self.record("toggle_tasks_status_by_id[100]", size, measure(
+            lambda: manager.toggle_tasks_status_by_id(rng.sample(ids, min(100, len(ids)))), slow_repeat))
+
+        def delete() -> None:
+            manager.delete_task_by_id(ids.pop(rng.randrange(len(ids))))
+        self.record("delete_task_by_id", size, measure(delete, slow_repeat))
+        self.record("stats", size, measure(manager.stats, self.repeat))
+        self.run_transfer(manager, size, slow_repeat)
+
+        with fake_curses(self.lines, self.cols):
+            screen = FakeScreen(self.lines, self.cols)
+            app = TaskTUI(screen, manager)
+            try:
+                self.run_views(app, size)
+                self.run_drawing(app, size)
+            finally:
+                os.close(app._wakeup_r)
+                os.close(app._wakeup_w)
+        manager.close()
+
+    def run_transfer(self, manager: TaskManager, size: int, repeat: int) -> None:
+        """Stream the tasks out as NDJSON and into an empty data file, as export and import do"""
+        ndjson_path = os.path.join(self.workdir, f"export-{size}.ndjson")
+        target_path = os.path.join(self.workdir, "import" + os.path.splitext(self.data_path(size))[1])
+
+        def export() -> None:
+            stored = manager.storage.iter_stored()
+            with open(ndjson_path, "w") as f:
+                write_records(f, "ndjson", (task.to_dict() for task in (stored or manager.tasks)))
+
+        def remove_target() -> None:
+            for suffix in ("", ".journal"):
+                if os.path.exists(target_path + suffix):
+                    os.remove(target_path + suffix)
+
+        def import_() -> None:
+            target = open_storage(target_path, backend=self.backend, journal=self.journal)
+            with open(ndjson_path) as f, target.appending() as append:
+                import_records(read_records(f, "ndjson"), set(), append)
+            target.close()
+
+        self.record("export[ndjson]", size, measure(export, repeat))
+        self.record("import[ndjson]", size, measure(import_, repeat, remove_target))
+
+    def run_views(self, app: TaskTUI, size: int) -> None:
+        # build_view is the uncached work behind get_filtered_and_sorted_tasks
+        for status in FILTERS:
+            for sort_mode in SortMode:
+                app.filter_status = status
+                app.sort_mode = sort_mode
+                name = f"view[{status.name if status else 'ALL'},{sort_mode.name}]"
+                self.record(name, size, measure(app.build_view, self.repeat))
+
+        app.filter_status = None
+        app.sort_mode = SortMode.PRIORITY_DESC
+        for query in ["b", "review", "fix bug"]:
+            app.search_query = query
+            self.record(f"view[search={query!r}]", size, measure(app.build_view, self.repeat))
+        app.search_query = ""
+
+    def run_drawing(self, app: TaskTUI, size: int) -> None:
+        app.filter_status = TaskStatus.TODO
+        app.sort_mode = SortMode.PRIORITY_DESC
+        app.current_row = 0
+        app.top_line = 0
+        app.draw_screen()
+        self.record("draw_screen[full]", size, measure(app.draw_screen, self.repeat, app.invalidate_screen))
+
+        def move() -> None:
+            app.handle_key(ord('j') if app.current_row % 20 < 10 else ord('k'))
+        self.record("draw_screen[cursor move]", size, measure(app.draw_screen, self.repeat, move))
+        self.record("draw_screen[unchanged]", size, measure(app.draw_screen, self.repeat))
+
+        app.handle_key(ord('g'))
+        self.record("draw_screen[page down]", size, measure(
+            app.draw_screen, self.repeat, lambda: app.handle_key(curses.KEY_NPAGE)))
+
+        def jump() -> None:
+            app.handle_key(ord('G') if app.current_row == 0 else ord('g'))
+        self.record("draw_screen[jump top/bottom]", size, measure(app.draw_screen, self.repeat, jump))
+
+
+def git_revision() -> Optional[str]:
+    try:
+        output = subprocess.run(["git", "rev-parse", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                universal_newlines=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return output.stdout.strip() or None
+
+
+def compare(results: List[Dict], baseline_path: str) -> None:
+    """Print how each median changed against a previous run's output"""
+    with open(baseline_path, "r") as f:
+        baseline = {(r["name"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"{'benchmark':<40} {'size':>9} {'before':>12} {'after':>12} {'change':>8}", file=sys.stderr)
+    for result in results:
+        before = baseline.get((result["name"], result["size"]))
+        if before is None:
+            continue
+        change = (result["median"] / before["median"] - 1) * 100 if before["median"] else 0.0
+        print(f"{result['name']:<40} {result['size']:>9} {before['median'] * 1000:>10.3f}ms "
+              f"{result['median'] * 1000:>10.3f}ms {change:>+7.1f}%", file=sys.stderr)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the task manager on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Numbers of tasks to benchmark (default: 1000 10000 100000)")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json",
+                        help="Storage format to benchmark (default: json)")
+    parser.add_argument("--journal", action="store_true", help="Benchmark the journaled json backend")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark (default: 5)")
+    parser.add_argument("--screen", type=int, nargs=2, default=[50, 120], metavar=("LINES", "COLS"),
+                        help="Size of the fake screen (default: 50 120)")
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file instead of stdout")
+    parser.add_argument("--compare", metavar="FILE", help="Show changes against a previous JSON output")
+    args = parser.parse_args()
+    if args.journal and args.backend != "json":
+        parser.error("--journal only applies to the json backend")
+    return args
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="task-benchmark-")
+    benchmark = Benchmark(workdir, args.backend, args.journal, args.repeat, *args.screen)
+    try:
+        for size in args.sizes:
+            benchmark.run(size)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "journal": args.journal,
+        "repeat": args.repeat,
+        "screen": args.screen,
+        "results": benchmark.results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(benchmark.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
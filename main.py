@@ -2,38 +2,155 @@
 import sys
 import os
 import argparse
-from curses import wrapper
+import signal
+from datetime import timedelta
 
+from task_cli import add_commands, run, socket_path
 from task_model import TaskManager
-from task_tui import TaskTUI
+from task_profile import Profiler
+from task_storage import ProfilingStorage, WriteBehindStorage, backend_for, open_storage
+
+# curses and the UI are imported only when the UI starts, so headless subcommands start fast
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Terminal-based Task Manager")
     parser.add_argument(
         "-f", "--file",
-        default="tasks.json",
-        help="Path to task data file (default: tasks.json)"
+        action="append",
+        help="Path to task data file (default: tasks.json); repeat it or name a directory "
+             "to work on several files at once"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["json", "sqlite"],
+        help="Storage format (default: sqlite for .db/.sqlite/.sqlite3 files, json otherwise)"
+    )
+    parser.add_argument(
+        "--journal",
+        action="store_true",
+        help="Append changes to a journal next to the data file instead of rewriting it"
+    )
+    parser.add_argument(
+        "--write-behind",
+        type=float,
+        metavar="SECONDS",
+        help="Save from a background thread, at most once every SECONDS"
+    )
+    parser.add_argument(
+        "--archive-after",
+        type=int,
+        metavar="DAYS",
+        help="Move done tasks created more than DAYS days ago to the archive on startup"
+    )
+    parser.add_argument(
+        "--connect",
+        action="store_true",
+        help="Use the task server started with the serve command instead of opening the file"
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="Unix socket of the task server (default: the data file path plus .sock)"
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Show frame and save timings on screen and print a latency histogram on exit"
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="FILE",
+        help="Run under cProfile, save the stats to FILE and print the hottest calls on exit"
+    )
+    subparsers = parser.add_subparsers(
+        dest="command",
+        title="commands",
+        description="Run one of these without starting the UI"
+    )
+    add_commands(subparsers)
+    args = parser.parse_args()
+    paths = args.file or ["tasks.json"]
+    if len(paths) == 1 and not os.path.isdir(paths[0]):
+        args.files = paths
+    else:
+        # Only a workspace pays for importing its thread pool
+        from task_workspace import workspace_files
+        args.files = workspace_files(paths)
+    if not args.files:
+        parser.error("no task files found in " + ", ".join(args.file))
+    if len(args.files) > 1 and (args.command is not None or args.connect):
+        parser.error("subcommands and --connect work on a single data file")
+    args.file = args.files[0]
+    if args.journal and any(backend_for(path, args.backend) != "json" for path in args.files):
+        parser.error("--journal only applies to the json backend")
+    return args
 
 
-def main(stdscr):
-    args = parse_args()
-    file_path = args.file
+def open_task_manager(args, file_path: str, profiler=None, background_load: bool = True) -> TaskManager:
+    storage = open_storage(file_path, backend=args.backend, journal=args.journal)
+    if profiler is not None:
+        # Inside any write-behind wrapper, so saves are timed where they hit the disk
+        storage = ProfilingStorage(storage, profiler.record)
+    if args.write_behind is not None:
+        storage = WriteBehindStorage(storage, interval=args.write_behind)
+    archive_after = timedelta(days=args.archive_after) if args.archive_after is not None else None
+    return TaskManager(file_path=file_path, storage=storage, background_load=background_load,
+                       archive_after=archive_after)
+
+
+def main(stdscr, args, profiler=None):
+    from task_tui import TaskTUI
     
-    # Make sure directory exists
-    file_dir = os.path.dirname(file_path)
-    if file_dir and not os.path.exists(file_dir):
-        os.makedirs(file_dir)
-        
-    task_manager = TaskManager(file_path=file_path)
-    app = TaskTUI(stdscr, task_manager)
-    app.run()
+    if args.connect:
+        from task_client import RemoteTaskManager
+        task_manager = RemoteTaskManager(socket_path(args))
+    elif len(args.files) > 1:
+        from task_workspace import Workspace
+        # The workspace loads the files side by side on its thread pool
+        task_manager = Workspace(args.files, lambda path: open_task_manager(args, path, profiler, False))
+    else:
+        task_manager = open_task_manager(args, args.file, profiler)
+    app = TaskTUI(stdscr, task_manager, profiler=profiler)
+    try:
+        app.run()
+    finally:
+        task_manager.close()
+
+
+def print_profile(stats_path: str) -> None:
+    """Print the hottest calls in the task modules from a saved cProfile run"""
+    import pstats
+    stats = pstats.Stats(stats_path, stream=sys.stderr)
+    stats.sort_stats("cumulative").print_stats(r"task_(model|tui|storage|search|io|journal|archive|watch|workspace|transfer)\.py", 30)
 
 
 if __name__ == "__main__":
+    # Exit through the normal shutdown path so pending saves are flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    args = parse_args()
+    if args.command is not None:
+        sys.exit(run(args))
+    
+    from curses import wrapper
+    profiler = Profiler() if args.profile else None
+    code_profiler = None
+    if args.cprofile:
+        import cProfile
+        code_profiler = cProfile.Profile()
+        code_profiler.enable()
     try:
-        wrapper(main)
+        wrapper(main, args, profiler)
     except KeyboardInterrupt:
-        sys.exit(0) 
\ No newline at end of file
+        sys.exit(0)
+    except ConnectionError as e:
+        print(f"task: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        # Reported once curses has given the terminal back
+        if code_profiler is not None:
+            code_profiler.disable()
+            code_profiler.dump_stats(args.cprofile)
+            print_profile(args.cprofile)
+        if profiler is not None:
+            profiler.report(sys.stderr) 
\ No newline at end of file
@@ -0,0 +1,126 @@
+import json
+import os
+from itertools import groupby
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from task_io import FileLock, file_signature, write_json_atomic
+from task_model import Priority, Task, from_timestamp
+
+
+class TaskArchive:
+    """DONE tasks moved out of the working file, one JSON segment per creation month.
+
+    Segments live in a directory next to the data file, named like
+    ``2023-05.json`` and holding a task array in the data file's format. Tasks
+    never change month, so editing an archived task rewrites only its segment.
+    Per-segment counts are cached in ``counts.cache`` next to the segments.
+    """
+
+    # Not a .json name, so it is never taken for a segment
+    COUNTS_FILE = "counts.cache"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = FileLock(path + ".lock")
+
+    @staticmethod
+    def segment_of(task: Task) -> str:
+        return from_timestamp(task.created).strftime("%Y-%m")
+
+    def segments(self) -> List[str]:
+        """Names of the segments on disk, oldest first"""
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len(".json")] for name in names if name.endswith(".json"))
+
+    def _segment_path(self, segment: str) -> str:
+        return os.path.join(self.path, segment + ".json")
+
+    def _read(self, segment: str) -> List[Dict]:
+        try:
+            with open(self._segment_path(segment), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def load(self) -> Iterator[Task]:
+        for segment in self.segments():
+            with self.lock:
+                stored = self._read(segment)
+            for task_data in stored:
+                try:
+                    yield Task.from_dict(task_data)
+                except KeyError:
+                    continue
+
+    def signature(self):
+        """Changes whenever a segment or the counts cache is written or removed, in any process"""
+        return file_signature(self.path)
+
+    def count(self) -> int:
+        return sum(self.counts().values())
+
+    def counts(self) -> Dict[Priority, int]:
+        """Number of archived tasks with each priority. Only segments changed since their
+        counts were cached are read, whichever process changed them."""
+        totals = {priority: 0 for priority in Priority}
+        segments = self.segments()
+        if not segments:
+            return totals
+        cache_path = os.path.join(self.path, self.COUNTS_FILE)
+        with self.lock:
+            try:
+                with open(cache_path, "r") as f:
+                    cache = json.load(f)
+            except (FileNotFoundError, ValueError):
+                cache = {}
+            changed = set(cache) != set(segments)
+            for segment in segments:
+                signature = list(file_signature(self._segment_path(segment)) or ())
+                entry = cache.get(segment)
+                if entry is None or entry["signature"] != signature:
+                    counts = {priority.name: 0 for priority in Priority}
+                    for task_data in self._read(segment):
+                        if task_data.get("priority") in counts:
+                            counts[task_data["priority"]] += 1
+                    entry = cache[segment] = {"signature": signature, "counts": counts}
+                    changed = True
+                for priority in Priority:
+                    totals[priority] += entry["counts"][priority.name]
+            if changed:
+                write_json_atomic(cache_path, {segment: cache[segment] for segment in segments})
+        return totals
+
+    def add(self, tasks: Iterable[Task]) -> None:
+        def edit(stored: List[Dict], tasks: Dict[str, Task]) -> List[Dict]:
+            kept = [task_data for task_data in stored if task_data.get("id") not in tasks]
+            return kept + [task.to_dict() for task in tasks.values()]
+        self._rewrite(tasks, edit)
+
+    def update(self, tasks: Iterable[Task]) -> None:
+        def edit(stored: List[Dict], tasks: Dict[str, Task]) -> List[Dict]:
+            return [tasks[task_data["id"]].to_dict() if task_data.get("id") in tasks else task_data
+                    for task_data in stored]
+        self._rewrite(tasks, edit)
+
+    def remove(self, tasks: Iterable[Task]) -> None:
+        def edit(stored: List[Dict], tasks: Dict[str, Task]) -> List[Dict]:
+            return [task_data for task_data in stored if task_data.get("id") not in tasks]
+        self._rewrite(tasks, edit)
+
+    def _rewrite(self, tasks: Iterable[Task],
+                 edit: Callable[[List[Dict], Dict[str, Task]], List[Dict]]) -> None:
+        """Rewrite the segment of each of ``tasks`` once, with ``edit`` applied to its task dicts"""
+        tasks = sorted(tasks, key=self.segment_of)
+        if not tasks:
+            return
+        with self.lock:
+            os.makedirs(self.path, exist_ok=True)
+            for segment, group in groupby(tasks, key=self.segment_of):
+                stored = edit(self._read(segment), {task.id: task for task in group})
+                if stored:
+                    write_json_atomic(self._segment_path(segment), stored)
+                elif os.path.exists(self._segment_path(segment)):
+                    os.remove(self._segment_path(segment))
@@ -0,0 +1,273 @@
+import json
+import os
+import sys
+from datetime import timedelta
+from itertools import chain
+from typing import Iterator, List, Optional, Set
+
+from task_archive import TaskArchive
+from task_model import AGE_BUCKETS, Priority, Task, TaskManager, TaskStatus
+from task_io import atomic_write
+from task_storage import TaskStorage, WriteBehindStorage, open_storage
+from task_transfer import FORMATS, format_for, import_records, read_records, write_records
+
+STATUS_CHOICES = ["todo", "done", "all"]
+SORT_CHOICES = ["none", "priority", "date"]
+
+
+def add_commands(subparsers) -> None:
+    """Register the headless subcommands on ``main.py``'s argument parser"""
+    add = subparsers.add_parser("add", help="Add a task")
+    add.add_argument("title", help="Task title")
+    add.add_argument("-p", "--priority", choices=["low", "medium", "high"], default="low",
+                     help="Task priority (default: low)")
+
+    list_parser = subparsers.add_parser("list", help="Print tasks, one per line, tab separated")
+    list_parser.add_argument("-s", "--status", choices=STATUS_CHOICES, default="todo",
+                             help="Which tasks to print (default: todo)")
+    list_parser.add_argument("--sort", choices=SORT_CHOICES, default="none",
+                             help="Order to print them in (default: none, the list order)")
+    list_parser.add_argument("--desc", action="store_true", help="Sort in descending order")
+
+    done = subparsers.add_parser("done", help="Mark tasks as done")
+    done.add_argument("ids", nargs="+", metavar="ID", help="Task id, or a unique prefix of one")
+
+    count = subparsers.add_parser("count", help="Print the number of tasks")
+    count.add_argument("-s", "--status", choices=STATUS_CHOICES, default="todo",
+                       help="Which tasks to count (default: todo)")
+
+    stats = subparsers.add_parser("stats", help="Print task counts, completion rate and open task ages")
+    stats.add_argument("--json", action="store_true", help="Print them as a JSON object")
+
+    export = subparsers.add_parser("export", help="Write all tasks, archived ones included")
+    export.add_argument("-o", "--output", help="File to write (default: stdout)")
+    export.add_argument("--format", choices=FORMATS,
+                        help="json array, ndjson (one object per line) or csv (default: by the "
+                             "output file's extension, json for stdout)")
+
+    import_parser = subparsers.add_parser("import", help="Add the tasks in a json, ndjson or csv file")
+    import_parser.add_argument("input", help="File to read, or - for stdin")
+    import_parser.add_argument("--format", choices=FORMATS,
+                               help="Format of the input (default: by its extension, json for stdin)")
+    import_parser.add_argument("--batch", type=int, default=1000, metavar="N",
+                               help="Write the tasks N at a time (default: 1000)")
+
+    archive = subparsers.add_parser("archive", help="Move old done tasks out of the data file")
+    archive.add_argument("days", type=int, help="Archive done tasks created more than DAYS days ago")
+
+    serve = subparsers.add_parser("serve", help="Serve the tasks to clients started with --connect")
+    serve.add_argument("--batch", type=float, default=0.05, metavar="SECONDS",
+                       help="Save at most once every SECONDS, batching the writes of all clients "
+                            "(default: 0.05)")
+
+
+def run(args) -> int:
+    """Run a headless subcommand and return the process exit code"""
+    try:
+        storage = open_storage(args.file, backend=args.backend, journal=args.journal)
+    except OSError as e:
+        print(f"task: cannot open {args.file}: {e.strerror}", file=sys.stderr)
+        return 1
+    try:
+        return COMMANDS[args.command](args, storage)
+    except BrokenPipeError:
+        # Output piped into e.g. head was cut off; keep Python from complaining again at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        storage.close()
+
+
+def socket_path(args) -> str:
+    """Unix socket of the task server for the data file"""
+    return args.socket or args.file + ".sock"
+
+
+def _status(name: str) -> Optional[TaskStatus]:
+    return None if name == "all" else TaskStatus[name.upper()]
+
+
+def _manager(args, storage: TaskStorage, status: Optional[TaskStatus] = TaskStatus.TODO) -> TaskManager:
+    """A manager over the data file, with the archive read in unless only ``status`` TODO is needed"""
+    manager = TaskManager(args.file, storage=storage)
+    if status != TaskStatus.TODO:
+        manager.load_archive()
+    return manager
+
+
+def cmd_add(args, storage: TaskStorage) -> int:
+    if not args.title.strip():
+        print("task: the title must not be empty", file=sys.stderr)
+        return 2
+    task = Task(args.title, Priority[args.priority.upper()])
+    # Skips loading the others (see TaskStorage.appending for the cost); a full load if it cannot
+    if not storage.append(task):
+        task = _manager(args, storage).add_task(args.title, task.priority)
+    print(task.id)
+    return 0
+
+
+def cmd_list(args, storage: TaskStorage) -> int:
+    key = {"none": None, "priority": "priority", "date": "creation_date"}[args.sort]
+    status = _status(args.status)
+    tasks = _manager(args, storage, status).get_ordered(status, key, args.desc)
+    out = sys.stdout
+    for task in tasks:
+        out.write(f"{task.id}\t{task.status.name}\t{task.priority.name}\t{task.creation_date}\t{task.title}\n")
+    return 0
+
+
+def cmd_done(args, storage: TaskStorage) -> int:
+    manager = _manager(args, storage)
+    task_ids: List[str] = []
+    code = 0
+    for prefix in args.ids:
+        matches = [task for task in manager.tasks if task.id.startswith(prefix)]
+        if len(matches) != 1:
+            problem = "no task" if not matches else f"{len(matches)} tasks"
+            print(f"task: {problem} with id {prefix}", file=sys.stderr)
+            code = 1
+        elif matches[0].status == TaskStatus.TODO:
+            task_ids.append(matches[0].id)
+    manager.toggle_tasks_status_by_id(task_ids)
+    return code
+
+
+def cmd_count(args, storage: TaskStorage) -> int:
+    status = _status(args.status)
+    # Backends that can count without building Task objects answer directly
+    counts = storage.count()
+    if counts is None:
+        manager = _manager(args, storage, status)
+        counts = {s: len(manager.get_tasks(s)) for s in TaskStatus}
+    elif status != TaskStatus.TODO:
+        counts[TaskStatus.DONE] += TaskArchive(args.file + ".archive").count()
+    print(sum(counts.values()) if status is None else counts[status])
+    return 0
+
+
+def cmd_stats(args, storage: TaskStorage) -> int:
+    # Without the archive read in, stats counts it from its cached per-segment counts
+    stats = _manager(args, storage).stats()
+    if args.json:
+        json.dump(stats.to_dict(), sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return 0
+    out = sys.stdout
+    for status in TaskStatus:
+        by_priority = "\t".join(f"{priority.name.lower()} {stats.count(status, priority)}" for priority in Priority)
+        out.write(f"{status.name.lower()}\t{stats.count(status)}\t{by_priority}\n")
+    out.write(f"complete\t{stats.completion_rate:.1%}\n")
+    for (name, _), count in zip(AGE_BUCKETS, stats.ages):
+        out.write(f"open {name}\t{count}\n")
+    return 0
+
+
+def _stored_tasks(args, storage: TaskStorage) -> Iterator[Task]:
+    """Every task, archived ones included, streamed from disk when the backend allows it"""
+    stored = storage.iter_stored()
+    if stored is None:
+        yield from _manager(args, storage, None).tasks
+        return
+    archive = TaskArchive(args.file + ".archive")
+    if not archive.segments():
+        yield from stored
+        return
+    # A crash while archiving can leave a task in both places; the stored copy wins
+    seen: Set[str] = set()
+    for task in stored:
+        seen.add(task.id)
+        yield task
+    for task in archive.load():
+        if task.id not in seen:
+            yield task
+
+
+def _known_ids(args, storage: TaskStorage) -> Set[str]:
+    """Ids of every task, archived ones included; import's one cost that grows with the data file"""
+    stored = storage.iter_stored()
+    if stored is None:
+        return {task.id for task in _manager(args, storage, None).tasks}
+    return {task.id for task in chain(stored, TaskArchive(args.file + ".archive").load())}
+
+
+def cmd_export(args, storage: TaskStorage) -> int:
+    fmt = args.format or format_for(args.output)
+    records = (task.to_dict() for task in _stored_tasks(args, storage))
+    if args.output:
+        # csv does its own line endings
+        with atomic_write(args.output, newline="" if fmt == "csv" else None) as f:
+            write_records(f, fmt, records)
+    else:
+        write_records(sys.stdout, fmt, records)
+        if fmt == "json":
+            sys.stdout.write("\n")
+    return 0
+
+
+def cmd_import(args, storage: TaskStorage) -> int:
+    if args.batch < 1:
+        print("task: --batch must be at least 1", file=sys.stderr)
+        return 2
+    fmt = args.format or format_for(args.input)
+    manager: Optional[TaskManager] = None
+
+    def add(tasks: List[Task]) -> None:
+        nonlocal manager
+        if manager is None:
+            manager = _manager(args, storage)
+        manager.add_tasks(tasks)
+
+    known_ids = _known_ids(args, storage)
+    name = "<stdin>" if args.input == "-" else args.input
+    try:
+        f = open(sys.stdin.fileno() if args.input == "-" else args.input, "r", newline="",
+                 closefd=args.input != "-")
+    except OSError as e:
+        print(f"task: cannot read {name}: {e.strerror}", file=sys.stderr)
+        return 1
+    # One appending block for the whole import, so a plain JSON file is copied once, not per batch
+    with f, storage.appending() as append:
+        try:
+            report = import_records(read_records(f, fmt), known_ids, append or add, args.batch)
+        except ValueError as e:
+            # Only a json array that stops parsing gets here; the tasks before it are imported
+            print(f"task: {name}: {e}", file=sys.stderr)
+            return 1
+    for position, message in report.errors:
+        print(f"task: {name}:{position}: {message}", file=sys.stderr)
+    print(f"imported {report.imported} tasks, skipped {report.duplicates} duplicates "
+          f"and {report.invalid} invalid records", file=sys.stderr)
+    return 1 if report.invalid else 0
+
+
+def cmd_archive(args, storage: TaskStorage) -> int:
+    count = _manager(args, storage).archive_tasks(timedelta(days=args.days))
+    print(f"archived {count} tasks")
+    return 0
+
+
+def cmd_serve(args, storage: TaskStorage) -> int:
+    # Imported here so the other subcommands start without asyncio
+    from task_server import serve
+    manager = TaskManager(args.file, storage=WriteBehindStorage(storage, interval=args.batch))
+    path = socket_path(args)
+    print(f"task: serving {args.file} on {path}", file=sys.stderr)
+    try:
+        serve(manager, path)
+    finally:
+        manager.close()
+    return 0
+
+
+COMMANDS = {
+    "add": cmd_add,
+    "list": cmd_list,
+    "done": cmd_done,
+    "count": cmd_count,
+    "stats": cmd_stats,
+    "export": cmd_export,
+    "import": cmd_import,
+    "archive": cmd_archive,
+    "serve": cmd_serve,
+}
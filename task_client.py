@@ -0,0 +1,242 @@
+import json
+import socket
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from task_model import Priority, Task, TaskStats, TaskStatus
+
+
+class RemoteError(Exception):
+    """An error response from the task server"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class TaskClient:
+    """Blocking JSON-RPC client for a TaskServer; calls may come from any thread.
+
+    A reader thread takes responses off the socket and hands notifications
+    to ``on_notify(method, params)``.
+    """
+
+    def __init__(self, path: str, on_notify: Optional[Callable[[str, Dict], None]] = None):
+        self.path = path
+        self.on_notify = on_notify
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(path)
+        except OSError as e:
+            self._socket.close()
+            raise ConnectionError(f"cannot connect to the task server at {path}: {e.strerror}") from e
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._responses: Dict[int, Dict] = {}
+        self._next_id = 0
+        self._closed = False
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def call(self, method: str, **params) -> Any:
+        with self._condition:
+            self._next_id += 1
+            request_id = self._next_id
+        request = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        with self._send_lock:
+            self._socket.sendall((json.dumps(request, separators=(",", ":")) + "\n").encode("utf-8"))
+        with self._condition:
+            while request_id not in self._responses:
+                if self._closed:
+                    raise ConnectionError("the task server closed the connection")
+                self._condition.wait()
+            response = self._responses.pop(request_id)
+        error = response.get("error")
+        if error is not None:
+            raise RemoteError(error.get("code", 0), error.get("message", "unknown error"))
+        return response.get("result")
+
+    def _read(self) -> None:
+        try:
+            for line in self._socket.makefile("rb"):
+                message = json.loads(line)
+                if message.get("id") is not None:
+                    with self._condition:
+                        self._responses[message["id"]] = message
+                        self._condition.notify_all()
+                elif "method" in message and self.on_notify is not None:
+                    self.on_notify(message["method"], message.get("params", {}))
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+
+    def close(self) -> None:
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        self._reader.join()
+
+
+class RemoteView(Sequence):
+    """A filtered, sorted view kept by the server, fetched a page at a time as rows are read.
+
+    Only the count and the first page come with the view; the rows a screen shows are
+    fetched when it reads them, so a change costs one page, not the whole list.
+    """
+
+    PAGE_SIZE = 256
+
+    def __init__(self, manager: "RemoteTaskManager", params: Dict):
+        self.manager = manager
+        self.params = params
+        self._pages: Dict[int, List[Task]] = {}
+        self._total = 0
+        self._fetch(0, self.PAGE_SIZE)
+
+    def _fetch(self, start: int, stop: int) -> None:
+        """Fetch the pages covering rows ``start`` to ``stop`` with one call"""
+        first = start // self.PAGE_SIZE
+        result = self.manager.client.call("list", offset=first * self.PAGE_SIZE,
+                                          limit=stop - first * self.PAGE_SIZE, **self.params)
+        self._total = result["total"]
+        tasks = [Task.from_dict(task_data) for task_data in result["tasks"]]
+        for i in range(0, len(tasks), self.PAGE_SIZE):
+            self._pages[first + i // self.PAGE_SIZE] = tasks[i:i + self.PAGE_SIZE]
+        # Rows from after a change are of the new version; the owner then asks for a new view
+        self.manager._set_version(result["version"])
+
+    def _rows(self, start: int, stop: int) -> List[Task]:
+        if start >= stop:
+            return []
+        first, last = start // self.PAGE_SIZE, (stop - 1) // self.PAGE_SIZE
+        missing = [page for page in range(first, last + 1) if page not in self._pages]
+        if missing:
+            self._fetch(missing[0] * self.PAGE_SIZE, (missing[-1] + 1) * self.PAGE_SIZE)
+        rows: List[Task] = []
+        for page in range(first, last + 1):
+            rows.extend(self._pages.get(page, ()))
+        offset = start - first * self.PAGE_SIZE
+        return rows[offset:offset + stop - start]
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._total)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return self._rows(start, stop)
+        if index < 0:
+            index += self._total
+        if not 0 <= index < self._total:
+            raise IndexError("view index out of range")
+        return self._rows(index, index + 1)[0]
+
+    def __iter__(self) -> Iterator[Task]:
+        # Walking the whole view, e.g. to mark every task, fetches the rest in one call
+        return iter(self._rows(0, self._total))
+
+
+class RemoteTaskManager:
+    """The TaskManager interface TaskTUI uses, backed by a TaskServer.
+
+    Reads return a RemoteView of the requested view that fetches rows as they
+    are read; ``version`` follows the server's, so a TaskTUI view cache asks
+    for a new one only after something changed.
+    """
+
+    def __init__(self, path: str):
+        self.loading = False
+        # The server reads the archive in itself when a view needs it
+        self.archive_loaded = True
+        self._listeners: List[Callable[[], None]] = []
+        self._version_lock = threading.Lock()
+        self.version = 0
+        self.client = TaskClient(path, on_notify=self._on_notify)
+        self._set_version(self.client.call("subscribe")["version"])
+
+    def _on_notify(self, method: str, params: Dict) -> None:
+        if method == "changed":
+            self._set_version(params["version"])
+
+    def _set_version(self, version: int) -> None:
+        with self._version_lock:
+            if version <= self.version:
+                return
+            self.version = version
+        for callback in self._listeners:
+            callback()
+
+    def _mutate(self, method: str, **params) -> Dict:
+        result = self.client.call(method, **params)
+        self._set_version(result["version"])
+        return result
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def watched_paths(self) -> List[str]:
+        return []
+
+    def sync(self) -> bool:
+        return False
+
+    def load_archive(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.client.close()
+
+    def _list(self, status: Optional[TaskStatus], key: Optional[str], descending: bool, query: str) -> RemoteView:
+        return RemoteView(self, {"status": status.name if status is not None else None, "key": key,
+                                 "descending": descending, "query": query})
+
+    def stats(self, now: Optional[datetime] = None) -> TaskStats:
+        # Ages are as of the server's clock
+        return TaskStats.from_dict(self.client.call("stats"))
+
+    def get_tasks(self, status: Optional[TaskStatus] = None) -> Sequence[Task]:
+        return self._list(status, None, False, "")
+
+    def get_ordered(self, status: Optional[TaskStatus] = None, key: Optional[str] = None,
+                    descending: bool = False) -> Sequence[Task]:
+        return self._list(status, key, descending, "")
+
+    def search(self, query: str, status: Optional[TaskStatus] = None, key: Optional[str] = None,
+               descending: bool = False) -> Sequence[Task]:
+        return self._list(status, key, descending, query)
+
+    def add_task(self, title: str, priority: Priority) -> Task:
+        return Task.from_dict(self._mutate("add", title=title, priority=priority.name)["task"])
+
+    def toggle_task_status_by_id(self, task_id: str) -> None:
+        self._mutate("toggle", ids=[task_id])
+
+    def toggle_tasks_status_by_id(self, task_ids: Iterable[str]) -> None:
+        self._mutate("toggle", ids=list(task_ids))
+
+    def update_task_title_by_id(self, task_id: str, new_title: str) -> None:
+        self._mutate("set_title", id=task_id, title=new_title)
+
+    def update_task_priority_by_id(self, task_id: str, new_priority: Priority) -> None:
+        self._mutate("set_priority", ids=[task_id], priority=new_priority.name)
+
+    def update_tasks_priority_by_id(self, task_ids: Iterable[str], new_priority: Priority) -> None:
+        self._mutate("set_priority", ids=list(task_ids), priority=new_priority.name)
+
+    def delete_task_by_id(self, task_id: str) -> None:
+        self._mutate("delete", ids=[task_id])
+
+    def delete_tasks_by_id(self, task_ids: Iterable[str]) -> None:
+        self._mutate("delete", ids=list(task_ids))
@@ -0,0 +1,144 @@
+import json
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import IO, Any, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows; locks are advisory anyway, so go without
+    fcntl = None
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(f: IO[str], chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time.
+
+    The file is read in ``chunk_size`` pieces, so memory use is bounded by the
+    largest element rather than the size of the file. Raises
+    ``json.JSONDecodeError`` on malformed or truncated input.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    state = "start"
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        need_more = pos == len(buffer)
+        if not need_more:
+            char = buffer[pos]
+            if state == "start":
+                if char != "[":
+                    raise json.JSONDecodeError("Expecting '['", buffer, pos)
+                pos += 1
+                state = "first"
+                continue
+            if state == "sep" or (state == "first" and char == "]"):
+                if char == "]":
+                    return
+                if char != ",":
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+                pos += 1
+                state = "value"
+                continue
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                need_more = True
+            else:
+                # A number cut off by the end of the chunk may decode as a shorter number,
+                # so only accept a value once the delimiter after it has been read
+                after = _WHITESPACE.match(buffer, end).end()
+                need_more = not eof and (after == len(buffer) or buffer[after] not in ",]")
+                if not need_more:
+                    yield value
+                    pos = end
+                    state = "sep"
+                    continue
+
+        if eof:
+            raise json.JSONDecodeError("Unexpected end of data", buffer, pos)
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w", newline: Optional[str] = None) -> Iterator[IO]:
+    """A file opened with ``mode`` that replaces ``path`` through a fsynced temp file and
+    ``os.replace`` once the block completes, so readers and crashes only ever see the old or
+    the new file"""
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, mode, newline=newline) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if os.path.exists(path):
+        shutil.copymode(path, temp_path)
+    os.replace(temp_path, path)
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """Write ``data`` as JSON with ``atomic_write``"""
+    with atomic_write(path) as f:
+        json.dump(data, f, indent=2)
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, size, mtime) of ``path``, or None if it does not exist. Any rewrite, swap or
+    append changes it."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class FileLock:
+    """Exclusive advisory lock on a lock file, held across processes with ``flock``.
+
+    Reentrant, and shared by the threads of one process: nested ``with`` blocks
+    on the same thread just count, and other threads wait their turn.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file: Optional[IO[str]] = None
+
+    def __enter__(self) -> "FileLock":
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._file = open(self.path, "a")
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except OSError:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            # Closing the file releases the flock
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
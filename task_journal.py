@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+from typing import ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from task_io import file_signature
+
+
+class TaskJournal:
+    """Append-only log of task mutations kept next to a JSON snapshot.
+
+    Each mutation is one line of JSON appended to ``<snapshot>.journal``.
+    Compaction rotates the log to ``<snapshot>.journal.1`` and folds it into a
+    new snapshot. The new snapshot is written to ``<snapshot>.compact`` and
+    fsynced first; removing the rotated log is the commit point, after which
+    the snapshot is swapped in with ``os.replace``. A crash at any step leaves
+    either the old snapshot with its logs or the new snapshot on disk.
+
+    ``lock`` guards the commit step against other processes reading or
+    recovering the same files; callers hold it around everything else.
+    """
+
+    def __init__(self, snapshot_path: str, compact_threshold: int = 1 << 20,
+                 lock: Optional[ContextManager] = None):
+        self.snapshot_path = snapshot_path
+        self.path = snapshot_path + ".journal"
+        self.rotated_path = self.path + ".1"
+        self.compact_path = snapshot_path + ".compact"
+        self.compact_threshold = compact_threshold
+        self.lock = lock if lock is not None else threading.RLock()
+        self._file = None
+        self._size = 0
+        self._snapshot_size = 0
+        self._compactor: Optional[threading.Thread] = None
+        # file_signature of the last snapshot this journal swapped in, for its owner to pick up
+        self.written_signature: Optional[Tuple[int, int, int]] = None
+
+    def recover(self) -> None:
+        """Finish or roll back a compaction interrupted by a crash"""
+        if os.path.exists(self.compact_path):
+            if os.path.exists(self.rotated_path):
+                # The rotated log was never removed, so the compaction never committed
+                os.remove(self.compact_path)
+            else:
+                os.replace(self.compact_path, self.snapshot_path)
+        if os.path.exists(self.snapshot_path):
+            self._snapshot_size = os.path.getsize(self.snapshot_path)
+
+    def has_rotated(self) -> bool:
+        return os.path.exists(self.rotated_path)
+
+    def read_rotated(self) -> Iterator[Dict]:
+        yield from self._read(self.rotated_path)
+
+    def read(self) -> Iterator[Dict]:
+        yield from self._read(self.path, truncate_torn=True)
+
+    def _read(self, path: str, truncate_torn: bool = False) -> Iterator[Dict]:
+        if not os.path.exists(path):
+            return
+        good_offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good_offset += len(line)
+                yield record
+        # Drop a partially written last record so new appends start on a clean line
+        if truncate_torn and good_offset != os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(good_offset)
+
+    def read_new(self, offset: int) -> Tuple[List[Dict], int]:
+        """Complete records written from byte ``offset`` on, and the offset after them"""
+        records = []
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break
+                    offset += len(line)
+        except FileNotFoundError:
+            pass
+        return records, offset
+
+    def append(self, record: Dict) -> None:
+        self.extend([record])
+
+    def extend(self, records: Iterable[Dict]) -> None:
+        """Append several records with a single write"""
+        if self._file is not None and self.inode() != os.fstat(self._file.fileno()).st_ino:
+            # Another process rotated the log away from under the open file
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+        self._file.flush()
+        self._size = self._file.tell()
+
+    def inode(self) -> Optional[int]:
+        """Inode of the current log file, which changes when the log is rotated"""
+        try:
+            return os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return None
+
+    def needs_compaction(self) -> bool:
+        if self._compactor is not None and self._compactor.is_alive():
+            return False
+        # Scaling the threshold with the snapshot keeps compaction amortized O(1) per write
+        return self._size > max(self.compact_threshold, self._snapshot_size)
+
+    def compact(self, snapshot: List[Dict], background: bool = True) -> None:
+        """Rotate the log and fold it into a new snapshot built from ``snapshot``"""
+        self.wait()
+        if self.has_rotated():
+            # A previous compaction failed; its log is still replayed on load
+            return
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.path):
+            os.replace(self.path, self.rotated_path)
+        self._size = 0
+        if background:
+            self._compactor = threading.Thread(target=self._write_snapshot, args=(snapshot,), daemon=True)
+            self._compactor.start()
+        else:
+            self._write_snapshot(snapshot)
+
+    def fold_rotated(self, snapshot: List[Dict]) -> None:
+        """Commit a rotated log left behind by a crash into a new snapshot"""
+        self._write_snapshot(snapshot)
+
+    def _write_snapshot(self, snapshot: List[Dict]) -> None:
+        with open(self.compact_path, "w") as f:
+            json.dump(snapshot, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        with self.lock:
+            if not os.path.exists(self.compact_path):
+                # Another process recovered from what looked like a crashed compaction
+                return
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+            os.replace(self.compact_path, self.snapshot_path)
+            self._snapshot_size = os.path.getsize(self.snapshot_path)
+            self.written_signature = file_signature(self.snapshot_path)
+
+    def wait(self) -> None:
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def close(self) -> None:
+        self.wait()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
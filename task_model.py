@@ -1,8 +1,19 @@
+import heapq
 import json
-import os
-from datetime import datetime
+import re
+import threading
+import uuid
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
 from enum import Enum, auto
-from typing import Dict, List, Optional
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import TYPE_CHECKING, Callable, Collection, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from task_search import TitleIndex
+
+if TYPE_CHECKING:
+    from task_storage import TaskStorage
 
 
 class Priority(Enum):
@@ -16,15 +27,82 @@ class TaskStatus(Enum):
     DONE = auto()
 
 
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+
+try:
+    _fromisoformat = datetime.fromisoformat
+except AttributeError:  # Python 3.6
+    def _fromisoformat(value: str) -> datetime:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f" if "." in value else "%Y-%m-%dT%H:%M:%S")
+
+
+def parse_date(value: str) -> datetime:
+    """The datetime a creation_date string stands for; raises ValueError if it is not a date"""
+    return _fromisoformat(value)
+
+
+# Dates that isoformat() reproduces exactly, which need no copy of the original text
+_CANONICAL_DATE = re.compile(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d{6})?\Z")
+
+
+def to_timestamp(moment: datetime) -> int:
+    """Microseconds since the epoch of a wall-clock datetime"""
+    # Plain integer arithmetic; going through timedelta is several times slower
+    seconds = (moment.toordinal() - _EPOCH_ORDINAL) * 86400 + moment.hour * 3600 + moment.minute * 60 + moment.second
+    return seconds * 1000000 + moment.microsecond
+
+
+def from_timestamp(timestamp: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=timestamp)
+
+
 class Task:
-    def __init__(self, title: str, priority: Priority, status: TaskStatus = TaskStatus.TODO):
+    # Slots instead of a per-instance __dict__ keep million-task lists compact
+    __slots__ = ("id", "title", "priority", "status", "created", "seq", "_raw_date")
+
+    def __init__(self, title: str, priority: Priority, status: TaskStatus = TaskStatus.TODO,
+                 created: Optional[int] = None, task_id: Optional[str] = None):
+        # Persistent identifier that stays the same however the list is sorted or edited
+        self.id = uuid.uuid4().hex if task_id is None else task_id
         self.title = title
-        self.creation_date = datetime.now().isoformat()
+        # Creation time as an integer timestamp so date sorts compare ints, not strings
+        self.created = to_timestamp(datetime.now()) if created is None else created
         self.priority = priority
         self.status = status
+        # Position key assigned by TaskManager; orders tasks the way they appear in the list
+        self.seq = 0
+        # Original creation_date text when isoformat() would not reproduce it exactly
+        self._raw_date: Optional[str] = None
+
+    @property
+    def creation_date(self) -> str:
+        if self._raw_date is not None:
+            return self._raw_date
+        return from_timestamp(self.created).isoformat()
+
+    @creation_date.setter
+    def creation_date(self, value: str) -> None:
+        try:
+            moment = _fromisoformat(value)
+        except ValueError:
+            self.created = 0
+            self._raw_date = value
+            return
+        self.created = to_timestamp(moment)
+        exact = _CANONICAL_DATE.match(value) is not None and (len(value) == 19 or moment.microsecond != 0)
+        self._raw_date = None if exact else value
+
+    @property
+    def creation_day(self) -> str:
+        """The creation date without the time of day, e.g. 2023-05-15"""
+        if self._raw_date is not None:
+            return self._raw_date.split('T')[0]
+        return from_timestamp(self.created).date().isoformat()
 
     def to_dict(self) -> Dict:
         return {
+            "id": self.id,
             "title": self.title,
             "creation_date": self.creation_date,
             "priority": self.priority.name,
@@ -35,65 +113,692 @@ class Task:
     def from_dict(cls, data: Dict) -> "Task":
         task = cls(
             title=data["title"],
-            priority=Priority[data["priority"]]
+            priority=Priority[data["priority"]],
+            status=TaskStatus[data["status"]],
+            created=0,
+            task_id=data.get("id")
         )
         task.creation_date = data["creation_date"]
-        task.status = TaskStatus[data["status"]]
         return task
 
 
+class Change(NamedTuple):
+    """One mutation for a storage backend to persist.
+
+    ``op`` is "add", "status", "title", "priority" or "delete".
+    """
+    op: str
+    task: Task
+
+
+# Age buckets for open tasks: name, and the age in days each holds tasks younger than
+AGE_BUCKETS: List[Tuple[str, Optional[int]]] = [("day", 1), ("week", 7), ("month", 30), ("older", None)]
+
+
+class TaskStats:
+    """Task counts from ``TaskManager.stats``.
+
+    ``counts`` holds the number of tasks per (status, priority) and ``ages``
+    the number of TODO tasks in each AGE_BUCKETS bucket, in that order.
+    """
+
+    def __init__(self, counts: Dict[Tuple[TaskStatus, Priority], int], ages: List[int]):
+        self.counts = counts
+        self.ages = ages
+
+    def count(self, status: Optional[TaskStatus] = None, priority: Optional[Priority] = None) -> int:
+        return sum(count for (task_status, task_priority), count in self.counts.items()
+                   if status in (None, task_status) and priority in (None, task_priority))
+
+    @property
+    def completion_rate(self) -> float:
+        """Fraction of the tasks that are done; 0 without tasks"""
+        total = self.count()
+        return self.count(TaskStatus.DONE) / total if total else 0.0
+
+    def __add__(self, other: "TaskStats") -> "TaskStats":
+        return TaskStats({key: count + other.counts[key] for key, count in self.counts.items()},
+                         [a + b for a, b in zip(self.ages, other.ages)])
+
+    def to_dict(self) -> Dict:
+        return {
+            "counts": {status.name: {priority.name: self.counts[(status, priority)] for priority in Priority}
+                       for status in TaskStatus},
+            "ages": {name: count for (name, _), count in zip(AGE_BUCKETS, self.ages)},
+            "completion_rate": self.completion_rate,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TaskStats":
+        return cls({(status, priority): data["counts"][status.name][priority.name]
+                    for status in TaskStatus for priority in Priority},
+                   [data["ages"][name] for name, _ in AGE_BUCKETS])
+
+
+def _discard(entries: List, entry) -> None:
+    """Remove ``entry`` from a sorted list"""
+    i = bisect_left(entries, entry)
+    if i < len(entries) and entries[i] == entry:
+        del entries[i]
+
+
+def _descending(entries: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Reverse (key, seq) entries while keeping ties in list order, like a stable reverse sort"""
+    result: List[Tuple[int, int]] = []
+    for _, group in groupby(reversed(entries), key=itemgetter(0)):
+        result.extend(reversed(list(group)))
+    return result
+
+
 class TaskManager:
-    def __init__(self, file_path: str = "tasks.json"):
+    """The task list, with indexes for filtered and sorted reads.
+
+    With ``archive_after``, DONE tasks created longer ago than that are moved
+    out of storage into a TaskArchive at ``<file_path>.archive`` once loaded.
+    Archived tasks are read back only by ``load_archive``; until then the
+    manager holds, loads and saves just the working set.
+    """
+
+    def __init__(self, file_path: str = "tasks.json", journal: bool = False, background_load: bool = False,
+                 storage: Optional["TaskStorage"] = None, archive_after: Optional[timedelta] = None):
+        # Imported here because these modules build on the Task model defined above
+        from task_archive import TaskArchive
+        if storage is None:
+            from task_storage import JsonStorage
+            storage = JsonStorage(file_path, journal=journal)
         self.file_path = file_path
-        self.tasks: List[Task] = []
-        self.load_tasks()
+        self.storage = storage
+        self.archive: "TaskArchive" = TaskArchive(file_path + ".archive")
+        self.archive_after = archive_after
+        # Tasks by id, in list order; dicts keep insertion order and delete in O(1)
+        self._by_id: Dict[str, Task] = {}
+        # Bumped on every change so views can tell when their cached results are stale
+        self.version = 0
+        # Callbacks run after each change, e.g. to wake up a UI waiting for events
+        self._listeners: List[Callable[[], None]] = []
+        # Guards the task list and indexes while a background load streams tasks in
+        self._lock = threading.RLock()
+        self._loader: Optional[threading.Thread] = None
+        self.loading = False
+        self.load_tasks(background=background_load)
+
+    @property
+    def tasks(self) -> List[Task]:
+        """All tasks in list order. Builds a new list; use ``len(manager)`` for the count."""
+        return list(self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def load_tasks(self, background: bool = False) -> None:
+        """Load tasks from storage, optionally streaming them in on a worker thread.
+
+        While a background load runs, ``loading`` is True and readers see the
+        tasks parsed so far. Mutators wait for the load to finish first.
+        """
+        self._wait_loaded()
+        self.version += 1
+        self._reset()
+        if background:
+            self.loading = True
+            self._loader = threading.Thread(target=self._stream_tasks, daemon=True)
+            self._loader.start()
+            return
+        try:
+            tasks = list(self.storage.load())
+        except (json.JSONDecodeError, KeyError):
+            tasks = []
+        self._insert_batch(tasks)
+        self._finish_loading()
+
+    def _stream_tasks(self) -> None:
+        # Small first batch so the first screen shows up at once, then grow to
+        # keep the per-batch re-sort of the date index cheap overall
+        batch_size = 256
+        batch: List[Task] = []
+        try:
+            for task in self.storage.load(streaming=True):
+                batch.append(task)
+                if len(batch) >= batch_size:
+                    self._add_loaded(batch)
+                    batch = []
+                    batch_size = min(batch_size * 2, 1 << 16)
+            self._add_loaded(batch)
+        except (json.JSONDecodeError, KeyError):
+            with self._lock:
+                self._reset()
+        with self._lock:
+            self._finish_loading()
+
+    def _add_loaded(self, batch: List[Task]) -> None:
+        with self._lock:
+            self._insert_batch(batch)
+            self.version += 1
+        self._notify()
+
+    def _finish_loading(self) -> None:
+        self.storage.replay(self._apply_record, self._snapshot)
+        if self.storage.migrated:
+            # Persist the ids given to tasks stored before ids existed
+            self.storage.save(self._by_id.values())
+        if self.archive_after is not None:
+            self._archive_before(to_timestamp(datetime.now() - self.archive_after))
+        self.loading = False
+        self.version += 1
+        self._notify()
+
+    def _wait_loaded(self) -> None:
+        if self._loader is not None:
+            self._loader.join()
+            self._loader = None
+
+    def _reset(self) -> None:
+        self._by_id = {}
+        self._by_seq: Dict[int, Task] = {}
+        self._status_index: Dict[TaskStatus, List[int]] = {status: [] for status in TaskStatus}
+        self._priority_index: Dict[Tuple[TaskStatus, Priority], List[int]] = {
+            (status, priority): [] for status in TaskStatus for priority in Priority
+        }
+        self._date_index: Dict[TaskStatus, List[Tuple[int, int]]] = {status: [] for status in TaskStatus}
+        self._title_index = TitleIndex()
+        self._next_seq = 0
+        # Tasks read back from the archive, which storage never sees
+        self._archived: Dict[str, Task] = {}
+        self.archive_loaded = False
+        # Archived tasks per priority for stats while the archive is not loaded; read once,
+        # kept up to date by archiving and read again when sync sees the archive change
+        self._archive_counts: Optional[Dict[Priority, int]] = None
+        self._archive_signature = None
+
+    def _insert_batch(self, tasks: List[Task]) -> None:
+        """Append many loaded tasks at once, re-sorting the date index once instead of per task.
+
+        Storage assigns ``seq`` on load, increasing in list order."""
+        for task in tasks:
+            seq = task.seq
+            self._next_seq = seq + 1
+            self._by_id[task.id] = task
+            self._by_seq[seq] = task
+            # New seqs are the largest so far, so appending keeps these lists sorted
+            self._status_index[task.status].append(seq)
+            self._priority_index[(task.status, task.priority)].append(seq)
+            self._date_index[task.status].append((task.created, seq))
+        for entries in self._date_index.values():
+            entries.sort()
+        self._title_index.add_many((task.seq, task.title) for task in tasks)
+
+    def _index(self, task: Task) -> None:
+        insort(self._status_index[task.status], task.seq)
+        insort(self._priority_index[(task.status, task.priority)], task.seq)
+        insort(self._date_index[task.status], (task.created, task.seq))
+
+    def _unindex(self, task: Task) -> None:
+        _discard(self._status_index[task.status], task.seq)
+        _discard(self._priority_index[(task.status, task.priority)], task.seq)
+        _discard(self._date_index[task.status], (task.created, task.seq))
+
+    def _unindex_many(self, tasks: List[Task]) -> None:
+        # Past a few hundred tasks, one pass over each index beats shifting it once per task
+        if len(tasks) * 256 <= len(self._by_id):
+            for task in tasks:
+                self._unindex(task)
+            return
+        seqs = {task.seq for task in tasks}
+        for entries in self._status_index.values():
+            entries[:] = [seq for seq in entries if seq not in seqs]
+        for entries in self._priority_index.values():
+            entries[:] = [seq for seq in entries if seq not in seqs]
+        for entries in self._date_index.values():
+            entries[:] = [entry for entry in entries if entry[1] not in seqs]
+
+    def _index_many(self, tasks: List[Task]) -> None:
+        if len(tasks) * 256 <= len(self._by_id):
+            for task in tasks:
+                self._index(task)
+            return
+        for task in tasks:
+            self._status_index[task.status].append(task.seq)
+            self._priority_index[(task.status, task.priority)].append(task.seq)
+            self._date_index[task.status].append((task.created, task.seq))
+        for index in (self._status_index, self._priority_index, self._date_index):
+            for entries in index.values():
+                entries.sort()
+
+    def _forget(self, task: Task) -> None:
+        """Drop a task whose sorted index entries are already gone"""
+        self._title_index.remove(task.seq, task.title)
+        del self._by_id[task.id]
+        del self._by_seq[task.seq]
+
+    def _insert(self, task: Task) -> None:
+        task.seq = self._next_seq
+        self._next_seq += 1
+        self._by_id[task.id] = task
+        self._by_seq[task.seq] = task
+        self._index(task)
+        self._title_index.add(task.seq, task.title)
+
+    def _remove(self, task: Task) -> None:
+        self._unindex(task)
+        self._forget(task)
+
+    def _set_status(self, task: Task, status: TaskStatus) -> None:
+        self._unindex(task)
+        task.status = status
+        self._index(task)
+
+    def _set_priority(self, task: Task, priority: Priority) -> None:
+        self._unindex(task)
+        task.priority = priority
+        self._index(task)
+
+    def _set_title(self, task: Task, title: str) -> None:
+        self._title_index.remove(task.seq, task.title)
+        task.title = title
+        self._title_index.add(task.seq, title)
 
-    def load_tasks(self) -> None:
-        if os.path.exists(self.file_path):
+    def _task_at(self, index: int) -> Optional[Task]:
+        """The task at a list position; O(n), kept for the positional API"""
+        if 0 <= index < len(self._by_id):
+            return next(islice(self._by_id.values(), index, None))
+        return None
+
+    def _apply_record(self, record: Dict) -> None:
+        try:
+            op = record["op"]
+            if op == "add":
+                task = Task.from_dict(record["task"])
+                if task.id not in self._by_id:
+                    self._insert(task)
+                return
+            # Journals written before task ids existed address tasks by position
+            if "id" in record:
+                task = self._by_id[record["id"]]
+            else:
+                task = self._task_at(record["index"])
+            if task is None:
+                return
+            if op == "status":
+                self._set_status(task, TaskStatus[record["value"]])
+            elif op == "title":
+                self._set_title(task, record["value"])
+            elif op == "priority":
+                self._set_priority(task, Priority[record["value"]])
+            elif op == "delete":
+                self._remove(task)
+        except (KeyError, IndexError, TypeError):
+            pass
+
+    def sync(self) -> bool:
+        """Merge in changes other processes made to the storage; returns whether there were any"""
+        if self.loading:
+            return False
+        with self._lock:
+            changed = self.storage.sync(self._apply_record, self._merge_stored)
+            if self._archive_counts is not None and self.archive.signature() != self._archive_signature:
+                self._archive_counts = None
+                changed = True
+            if changed:
+                self.version += 1
+        if changed:
+            self._notify()
+        return changed
+
+    def watched_paths(self) -> List[str]:
+        """Files to watch for other processes' changes, to know when to call ``sync``"""
+        return self.storage.watched_paths()
+
+    def _merge_stored(self, stored: List[Dict]) -> None:
+        """Make the tasks match ``stored`` task dicts, touching only the tasks that differ"""
+        seen = set()
+        for task_data in stored:
+            task_id = task_data["id"]
+            seen.add(task_id)
+            task = self._by_id.get(task_id)
             try:
-                with open(self.file_path, "r") as f:
-                    data = json.load(f)
-                    self.tasks = [Task.from_dict(task_data) for task_data in data]
-            except (json.JSONDecodeError, KeyError):
-                self.tasks = []
-        else:
-            self.tasks = []
+                if task is None:
+                    self._insert(Task.from_dict(task_data))
+                    continue
+                if task.title != task_data["title"]:
+                    self._set_title(task, task_data["title"])
+                if task.status.name != task_data["status"]:
+                    self._set_status(task, TaskStatus[task_data["status"]])
+                if task.priority.name != task_data["priority"]:
+                    self._set_priority(task, Priority[task_data["priority"]])
+            except KeyError:
+                continue
+            # Whatever is in storage is part of the working set, even if it was once archived
+            self._archived.pop(task_id, None)
+        removed = [task for task_id, task in self._by_id.items()
+                   if task_id not in seen and task_id not in self._archived]
+        self._unindex_many(removed)
+        for task in removed:
+            self._forget(task)
+
+    def _snapshot(self) -> List[Dict]:
+        return [task.to_dict() for task in self._live_tasks()]
+
+    def _live_tasks(self) -> Collection[Task]:
+        """The tasks storage keeps: all of them but those loaded from the archive"""
+        if not self._archived:
+            return self._by_id.values()
+        return [task for task in self._by_id.values() if task.id not in self._archived]
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self) -> None:
+        for callback in self._listeners:
+            callback()
+
+    def _commit(self, *changes: Change) -> None:
+        self.version += 1
+        self._notify()
+        if not self._archived:
+            self.storage.commit(self._by_id.values(), list(changes))
+            return
+        stored: List[Change] = []
+        updated: List[Task] = []
+        removed: List[Task] = []
+        for change in changes:
+            task = change.task
+            if task.id not in self._archived:
+                stored.append(change)
+            elif change.op == "delete":
+                removed.append(self._archived.pop(task.id))
+            elif change.op == "status" and task.status != TaskStatus.DONE:
+                # Back to work: the task returns to storage
+                removed.append(self._archived.pop(task.id))
+                stored.append(Change("add", task))
+            else:
+                updated.append(task)
+        if stored:
+            # Stored first, so a crash in between leaves a duplicate that load_archive skips
+            self.storage.commit(self._live_tasks(), stored)
+        self.archive.update(updated)
+        self.archive.remove(removed)
 
     def save_tasks(self) -> None:
-        with open(self.file_path, "w") as f:
-            json.dump([task.to_dict() for task in self.tasks], f, indent=2)
+        self._wait_loaded()
+        self.storage.save(self._live_tasks())
+
+    def load_archive(self) -> None:
+        """Read archived tasks back into the list, after the working set; once per load"""
+        self._wait_loaded()
+        with self._lock:
+            if self.archive_loaded:
+                return
+            self.archive_loaded = True
+            tasks = [task for task in self.archive.load() if task.id not in self._by_id]
+            if not tasks:
+                return
+            for seq, task in enumerate(tasks, self._next_seq):
+                task.seq = seq
+                self._archived[task.id] = task
+            self._insert_batch(tasks)
+            self.version += 1
+        self._notify()
+
+    def archive_tasks(self, older_than: timedelta) -> int:
+        """Move DONE tasks created more than ``older_than`` ago to the archive; returns how many"""
+        self._wait_loaded()
+        return self._archive_before(to_timestamp(datetime.now() - older_than))
+
+    def _archive_before(self, cutoff: int) -> int:
+        with self._lock:
+            entries = self._date_index[TaskStatus.DONE]
+            # The date index is sorted, so the old DONE tasks are a prefix of it
+            end = bisect_left(entries, (cutoff, -1))
+            tasks = [self._by_seq[seq] for _, seq in entries[:end] if self._by_seq[seq].id not in self._archived]
+            if not tasks:
+                return 0
+            # Archived before storage forgets them, so a crash in between leaves a duplicate
+            with self.archive.lock:
+                self.archive.add(tasks)
+                if self._archive_counts is not None:
+                    # Our own write; counted below rather than read back
+                    self._archive_signature = self.archive.signature()
+            if self.archive_loaded:
+                # Still shown; storage just stops keeping them
+                for task in tasks:
+                    self._archived[task.id] = task
+            else:
+                self._unindex_many(tasks)
+                for task in tasks:
+                    self._forget(task)
+                if self._archive_counts is not None:
+                    for task in tasks:
+                        self._archive_counts[task.priority] += 1
+            self.version += 1
+        self._notify()
+        self.storage.commit(self._live_tasks(), [Change("delete", task) for task in tasks])
+        return len(tasks)
+
+    def close(self) -> None:
+        self._wait_loaded()
+        self.storage.close()
 
     def add_task(self, title: str, priority: Priority) -> Task:
+        self._wait_loaded()
         task = Task(title=title, priority=priority)
-        self.tasks.append(task)
-        self.save_tasks()
+        self._insert(task)
+        self._commit(Change("add", task))
         return task
 
-    def toggle_task_status(self, index: int) -> None:
-        if 0 <= index < len(self.tasks):
-            task = self.tasks[index]
+    def add_tasks(self, tasks: Iterable[Task]) -> List[Task]:
+        """Add tasks built elsewhere, such as imported ones, with one commit, skipping any
+        whose id is already taken; returns the tasks added"""
+        self._wait_loaded()
+        added: List[Task] = []
+        for task in tasks:
+            if task.id in self._by_id:
+                continue
+            task.seq = self._next_seq
+            self._next_seq += 1
+            self._by_id[task.id] = task
+            self._by_seq[task.seq] = task
+            added.append(task)
+        if not added:
+            return added
+        self._index_many(added)
+        self._title_index.add_many((task.seq, task.title) for task in added)
+        self._commit(*(Change("add", task) for task in added))
+        return added
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        return self._by_id.get(task_id)
+
+    def toggle_task_status_by_id(self, task_id: str) -> None:
+        self._wait_loaded()
+        task = self._by_id.get(task_id)
+        if task is not None:
             if task.status == TaskStatus.TODO:
-                task.status = TaskStatus.DONE
+                self._set_status(task, TaskStatus.DONE)
             else:
-                task.status = TaskStatus.TODO
-            self.save_tasks()
+                self._set_status(task, TaskStatus.TODO)
+            self._commit(Change("status", task))
+
+    def update_task_title_by_id(self, task_id: str, new_title: str) -> None:
+        self._wait_loaded()
+        task = self._by_id.get(task_id)
+        if task is not None and new_title.strip():
+            self._set_title(task, new_title)
+            self._commit(Change("title", task))
+
+    def update_task_priority_by_id(self, task_id: str, new_priority: Priority) -> None:
+        self._wait_loaded()
+        task = self._by_id.get(task_id)
+        if task is not None:
+            self._set_priority(task, new_priority)
+            self._commit(Change("priority", task))
+
+    def delete_task_by_id(self, task_id: str) -> None:
+        self._wait_loaded()
+        task = self._by_id.get(task_id)
+        if task is not None:
+            self._remove(task)
+            self._commit(Change("delete", task))
+
+    # Bulk variants: one index update, one notification and one storage commit per call
+
+    def _tasks_by_ids(self, task_ids: Iterable[str]) -> List[Task]:
+        tasks = []
+        seen = set()
+        for task_id in task_ids:
+            task = self._by_id.get(task_id)
+            if task is not None and task_id not in seen:
+                seen.add(task_id)
+                tasks.append(task)
+        return tasks
+
+    def toggle_tasks_status_by_id(self, task_ids: Iterable[str]) -> None:
+        """Toggle each task between TODO and DONE"""
+        self._wait_loaded()
+        tasks = self._tasks_by_ids(task_ids)
+        if tasks:
+            self._unindex_many(tasks)
+            for task in tasks:
+                task.status = TaskStatus.DONE if task.status == TaskStatus.TODO else TaskStatus.TODO
+            self._index_many(tasks)
+            self._commit(*(Change("status", task) for task in tasks))
+
+    def update_tasks_priority_by_id(self, task_ids: Iterable[str], new_priority: Priority) -> None:
+        self._wait_loaded()
+        tasks = [task for task in self._tasks_by_ids(task_ids) if task.priority != new_priority]
+        if tasks:
+            self._unindex_many(tasks)
+            for task in tasks:
+                task.priority = new_priority
+            self._index_many(tasks)
+            self._commit(*(Change("priority", task) for task in tasks))
+
+    def delete_tasks_by_id(self, task_ids: Iterable[str]) -> None:
+        self._wait_loaded()
+        tasks = self._tasks_by_ids(task_ids)
+        if tasks:
+            self._unindex_many(tasks)
+            for task in tasks:
+                self._forget(task)
+            self._commit(*(Change("delete", task) for task in tasks))
+
+    # Positional variants, resolved to ids; finding the position is O(n)
+
+    def toggle_task_status(self, index: int) -> None:
+        self._wait_loaded()
+        task = self._task_at(index)
+        if task is not None:
+            self.toggle_task_status_by_id(task.id)
 
     def update_task_title(self, index: int, new_title: str) -> None:
-        if 0 <= index < len(self.tasks) and new_title.strip():
-            self.tasks[index].title = new_title
-            self.save_tasks()
+        self._wait_loaded()
+        task = self._task_at(index)
+        if task is not None:
+            self.update_task_title_by_id(task.id, new_title)
 
     def update_task_priority(self, index: int, new_priority: Priority) -> None:
-        if 0 <= index < len(self.tasks):
-            self.tasks[index].priority = new_priority
-            self.save_tasks()
+        self._wait_loaded()
+        task = self._task_at(index)
+        if task is not None:
+            self.update_task_priority_by_id(task.id, new_priority)
 
     def delete_task(self, index: int) -> None:
-        if 0 <= index < len(self.tasks):
-            del self.tasks[index]
-            self.save_tasks()
+        self._wait_loaded()
+        task = self._task_at(index)
+        if task is not None:
+            self.delete_task_by_id(task.id)
 
     def get_tasks(self, status: Optional[TaskStatus] = None) -> List[Task]:
-        if status is None:
-            return self.tasks
-        return [task for task in self.tasks if task.status == status] 
\ No newline at end of file
+        with self._lock:
+            if status is None:
+                return list(self._by_id.values())
+            return self._tasks_for(self._status_index[status])
+
+    def stats(self, now: Optional[datetime] = None) -> TaskStats:
+        """Task counts read off the indexes without visiting any task, plus the archive's until
+        it is loaded. Ages are as of ``now`` (default: the current time)."""
+        moment = now or datetime.now()
+        with self._lock:
+            counts = {key: len(seqs) for key, seqs in self._priority_index.items()}
+            # The date index is sorted, so each cutoff splits it with one bisection
+            entries = self._date_index[TaskStatus.TODO]
+            older = [len(entries)]
+            for _, days in AGE_BUCKETS[:-1]:
+                older.append(bisect_left(entries, (to_timestamp(moment - timedelta(days=days)), -1)))
+            older.append(0)
+        if not self.archive_loaded:
+            # Archived tasks are all DONE, so they only add to those counts
+            for priority, count in self._get_archive_counts().items():
+                counts[(TaskStatus.DONE, priority)] += count
+        return TaskStats(counts, [older[i] - older[i + 1] for i in range(len(AGE_BUCKETS))])
+
+    def _get_archive_counts(self) -> Dict[Priority, int]:
+        with self._lock:
+            if self._archive_counts is None:
+                self._archive_signature = self.archive.signature()
+                if self._archive_signature is None:
+                    self._archive_counts = {priority: 0 for priority in Priority}
+                else:
+                    # Under the archive lock, so no other process writes between the two
+                    with self.archive.lock:
+                        self._archive_counts = self.archive.counts()
+                        self._archive_signature = self.archive.signature()
+            return self._archive_counts
+
+    def get_ordered(self, status: Optional[TaskStatus] = None, key: Optional[str] = None,
+                    descending: bool = False) -> List[Task]:
+        """Tasks with ``status`` (or all) ordered by ``key`` ("priority", "creation_date" or None
+        for list order), read straight from the indexes. Ties keep list order."""
+        with self._lock:
+            statuses = list(TaskStatus) if status is None else [status]
+            if key == "priority":
+                result: List[Task] = []
+                for priority in sorted(Priority, key=lambda p: p.value, reverse=descending):
+                    result.extend(self._tasks_for(self._merged(
+                        self._priority_index[(s, priority)] for s in statuses)))
+                return result
+            if key == "creation_date":
+                entries = list(self._merged(self._date_index[s] for s in statuses))
+                if descending:
+                    entries = _descending(entries)
+                return [self._by_seq[seq] for _, seq in entries]
+            if status is None:
+                return list(self._by_id.values())
+            return self._tasks_for(self._status_index[status])
+
+    def search(self, query: str, status: Optional[TaskStatus] = None, key: Optional[str] = None,
+               descending: bool = False) -> List[Task]:
+        """Tasks whose title has a word starting with each word of ``query``, filtered and
+        ordered like ``get_ordered``. A query with no words matches every task."""
+        with self._lock:
+            seqs = self._title_index.search(query)
+            if seqs is None:
+                return self.get_ordered(status, key, descending)
+            if len(seqs) * 4 > len(self._by_id):
+                # Most tasks match, so walking the sorted indexes beats sorting the matches
+                return [task for task in self.get_ordered(status, key, descending) if task.seq in seqs]
+            by_seq = self._by_seq
+            # Only the matches are sorted, so this costs nothing per non-matching task
+            result = [by_seq[seq] for seq in sorted(seqs)]
+            if status is not None:
+                result = [task for task in result if task.status == status]
+            if key == "priority":
+                result.sort(key=lambda task: task.priority.value, reverse=descending)
+            elif key == "creation_date":
+                # Stable sorts keep ties in list order in both directions
+                result.sort(key=lambda task: task.created, reverse=descending)
+            return result
+
+    @staticmethod
+    def _merged(indexes: Iterable[List]) -> Iterable:
+        indexes = list(indexes)
+        if len(indexes) == 1:
+            return indexes[0]
+        return heapq.merge(*indexes)
+
+    def _tasks_for(self, seqs: Iterable[int]) -> List[Task]:
+        by_seq = self._by_seq
+        return [by_seq[seq] for seq in seqs] 
\ No newline at end of file
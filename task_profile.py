@@ -0,0 +1,83 @@
+import math
+from collections import deque
+from typing import Deque, Dict, List, Optional, TextIO
+
+
+class LatencyStats:
+    """Timings of one operation: recent samples for percentiles and a histogram of all of them"""
+
+    def __init__(self, window: int = 1000):
+        self.recent: Deque[float] = deque(maxlen=window)
+        # Sample counts by power-of-two bucket of microseconds
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.recent.append(seconds)
+        bucket = max(0, math.frexp(seconds * 1000000)[1])
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percent: float) -> float:
+        """The ``percent`` percentile of the recent samples, in seconds"""
+        if not self.recent:
+            return 0.0
+        samples = sorted(self.recent)
+        return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+class Profiler:
+    """Named latency statistics, e.g. for the phases of each frame and for saves"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.stats: Dict[str, LatencyStats] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        stats = self.stats.get(name)
+        if stats is None:
+            # setdefault keeps this safe when a background writer records at the same time
+            stats = self.stats.setdefault(name, LatencyStats(self.window))
+        stats.add(seconds)
+
+    def get(self, name: str) -> Optional[LatencyStats]:
+        return self.stats.get(name)
+
+    def report(self, out: TextIO) -> None:
+        """Write a summary and latency histogram of everything recorded"""
+        for name, stats in sorted(self.stats.items()):
+            if not stats.count:
+                continue
+            out.write(f"{name}: {stats.count} samples, mean {format_ms(stats.total / stats.count)}, "
+                      f"p50 {format_ms(stats.percentile(50))}, p99 {format_ms(stats.percentile(99))}, "
+                      f"max {format_ms(stats.max)}\n")
+            largest = max(stats.buckets.values())
+            for bucket in range(min(stats.buckets), max(stats.buckets) + 1):
+                count = stats.buckets.get(bucket, 0)
+                bar = "#" * math.ceil(40 * count / largest) if count else ""
+                out.write(f"  < {format_ms((1 << bucket) / 1000000):>9} {count:>8} {bar}\n")
+
+
+def format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms" if seconds >= 0.001 else f"{seconds * 1000000:.0f}us"
+
+
+def hud_lines(profiler: Profiler) -> List[str]:
+    """Text of the on-screen timing display"""
+    def last(name: str) -> str:
+        stats = profiler.get(name)
+        return format_ms(stats.last) if stats is not None and stats.count else "-"
+
+    frame = profiler.get("frame")
+    p50 = format_ms(frame.percentile(50)) if frame is not None else "-"
+    p99 = format_ms(frame.percentile(99)) if frame is not None else "-"
+    return [
+        f"frame {last('frame')}  view {last('view')}  render {last('render')}  refresh {last('refresh')}",
+        f"frame p50 {p50}  p99 {p99}  save {last('save')}",
+    ]
@@ -0,0 +1,115 @@
+import re
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words of ``text``"""
+    return _WORD.findall(text.lower())
+
+
+def _insert(seqs: array, seq: int) -> None:
+    # New tasks get the highest seq yet, so this is nearly always an append
+    if seqs and seqs[-1] > seq:
+        insort(seqs, seq)
+    else:
+        seqs.append(seq)
+
+
+def _contains(seqs: array, seq: int) -> bool:
+    i = bisect_left(seqs, seq)
+    return i < len(seqs) and seqs[i] == seq
+
+
+class TitleIndex:
+    """Inverted index from title words to task seqs, with prefix lookup.
+
+    A query matches a title when every query word is a prefix of some word
+    in the title, ignoring case. Words are kept in a sorted list, so each
+    prefix is a bisect plus a walk over only the words that start with it.
+    Each word's seqs are a sorted array of machine ints, a fraction of the
+    memory of a set of them.
+    """
+
+    # Most words a prefix may cover before narrowing one posting at a time stops paying off
+    INTERSECT_EACH = 16
+
+    # How much longer than the narrowing set a posting must be before bisecting it for each
+    # member beats a C-level intersection with all of it
+    BISECT_RATIO = 32
+
+    def __init__(self):
+        self._postings: Dict[str, array] = {}
+        # Sorted words for prefix ranges; None after a bulk add until the next query
+        self._words: Optional[List[str]] = []
+
+    def add(self, seq: int, title: str) -> None:
+        for word in set(tokenize(title)):
+            seqs = self._postings.get(word)
+            if seqs is None:
+                seqs = self._postings[word] = array("l")
+                if self._words is not None:
+                    insort(self._words, word)
+            _insert(seqs, seq)
+
+    def add_many(self, entries: Iterable[Tuple[int, str]]) -> None:
+        """Add many (seq, title) pairs, sorting the words once at the next query"""
+        self._words = None
+        postings = self._postings
+        for seq, title in entries:
+            for word in set(tokenize(title)):
+                seqs = postings.get(word)
+                if seqs is None:
+                    seqs = postings[word] = array("l")
+                _insert(seqs, seq)
+
+    def remove(self, seq: int, title: str) -> None:
+        for word in set(tokenize(title)):
+            seqs = self._postings.get(word)
+            if seqs is None:
+                continue
+            i = bisect_left(seqs, seq)
+            if i < len(seqs) and seqs[i] == seq:
+                del seqs[i]
+            if not seqs:
+                del self._postings[word]
+                if self._words is not None:
+                    i = bisect_left(self._words, word)
+                    if i < len(self._words) and self._words[i] == word:
+                        del self._words[i]
+
+    def _prefixed(self, prefix: str, within: Optional[Set[int]] = None) -> Set[int]:
+        """Seqs of titles with a word starting with ``prefix``, limited to ``within`` if given"""
+        if self._words is None:
+            self._words = sorted(self._postings)
+        words = self._words
+        start = bisect_left(words, prefix)
+        # Every word starting with prefix sorts before prefix followed by the largest code point
+        end = bisect_left(words, prefix + "\U0010ffff", start)
+        postings = map(self._postings.__getitem__, words[start:end])
+        if within is not None:
+            if end - start <= self.INTERSECT_EACH:
+                # Narrowing by each posting costs about the smaller of the two sizes, never the union's
+                return set().union(*({seq for seq in within if _contains(seqs, seq)}
+                                     if len(within) * self.BISECT_RATIO < len(seqs)
+                                     else within.intersection(seqs) for seqs in postings))
+            return within.intersection(set().union(*postings))
+        if end - start == 1:
+            return set(next(postings))
+        return set().union(*postings)
+
+    def search(self, query: str) -> Optional[Set[int]]:
+        """Seqs of titles matching ``query``, or None if the query has no words"""
+        words = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not words:
+            return None
+        # Longer prefixes match fewer titles, so start from them to keep intersections small
+        result = self._prefixed(words[0])
+        for word in words[1:]:
+            if not result:
+                break
+            result = self._prefixed(word, result)
+        return result
@@ -0,0 +1,321 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from task_model import Priority, Task, TaskManager, TaskStatus
+from task_watch import FileWatcher
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# Longest request line accepted, which bounds what one client can make the server buffer
+MAX_REQUEST = 1 << 20
+
+SORT_KEYS = (None, "priority", "creation_date")
+
+# Views kept for clients paging through them; each is one list of the manager's own tasks
+VIEW_CACHE_SIZE = 8
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def _status(name: Optional[str]) -> Optional[TaskStatus]:
+    return None if name is None else TaskStatus[name]
+
+
+def _encode(message: Dict) -> bytes:
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class TaskServer:
+    """Serves one TaskManager to any number of clients over a Unix socket.
+
+    The protocol is JSON-RPC 2.0 with one message per line. After a
+    ``subscribe`` call the server pushes a ``changed`` notification carrying
+    the new version whenever the tasks change; changes made within one turn
+    of the event loop are announced once. The manager's own storage decides
+    how writes hit the disk, so give it a WriteBehindStorage to batch them.
+    """
+
+    def __init__(self, manager: TaskManager, path: str):
+        self.manager = manager
+        self.path = path
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._subscribers: Set[asyncio.StreamWriter] = set()
+        # One task per connected client, cancelled on close
+        self._handlers: Set[asyncio.Task] = set()
+        self._change_pending = False
+        self._watcher: Optional[FileWatcher] = None
+        self._thread: Optional[threading.Thread] = None
+        # Built views by (version, status, key, descending, query), most recently used last
+        self._views: "OrderedDict[Tuple, List[Task]]" = OrderedDict()
+        self.methods: Dict[str, Callable[..., Any]] = {
+            "version": self.rpc_version,
+            "list": self.rpc_list,
+            "count": self.rpc_count,
+            "stats": self.rpc_stats,
+            "add": self.rpc_add,
+            "toggle": self.rpc_toggle,
+            "set_title": self.rpc_set_title,
+            "set_priority": self.rpc_set_priority,
+            "delete": self.rpc_delete,
+        }
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_event_loop()
+        _remove_stale_socket(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=MAX_REQUEST)
+        self.manager.add_listener(self._on_change)
+        # Changes other processes make to the data file reach clients too
+        self._watcher = FileWatcher(self.manager.watched_paths())
+        if self._watcher.fileno() is not None:
+            self._loop.add_reader(self._watcher.fileno(), self._check_files)
+        else:
+            self._loop.call_later(FileWatcher.POLL_INTERVAL, self._poll_files)
+
+    async def close(self) -> None:
+        self.manager.remove_listener(self._on_change)
+        if self._watcher is not None:
+            if self._watcher.fileno() is not None:
+                self._loop.remove_reader(self._watcher.fileno())
+            self._watcher.close()
+            self._watcher = None
+        if self._server is not None:
+            self._server.close()
+        # Handlers wait on their clients; cancel them so none is left pending when the loop stops
+        for handler in list(self._handlers):
+            handler.cancel()
+        if self._handlers:
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        self._subscribers.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def serve_in_thread(self) -> None:
+        """Run the server on its own event loop thread, returning once it accepts connections"""
+        started = threading.Event()
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.close())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self) -> None:
+        """Stop a server started with ``serve_in_thread``"""
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def _check_files(self) -> None:
+        if self._watcher is not None and self._watcher.changed():
+            self.manager.sync()
+
+    def _poll_files(self) -> None:
+        if self._watcher is not None:
+            self._check_files()
+            self._loop.call_later(FileWatcher.POLL_INTERVAL, self._poll_files)
+
+    def _on_change(self) -> None:
+        # Listeners may run on storage or loader threads; hop onto the loop, once per turn
+        if not self._change_pending:
+            self._change_pending = True
+            self._loop.call_soon_threadsafe(self._broadcast)
+
+    def _broadcast(self) -> None:
+        self._change_pending = False
+        message = _encode({"jsonrpc": "2.0", "method": "changed", "params": {"version": self.manager.version}})
+        for writer in list(self._subscribers):
+            if writer.transport.is_closing():
+                self._subscribers.discard(writer)
+            else:
+                writer.write(message)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        handler = _current_task()
+        self._handlers.add(handler)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = self._dispatch(line, writer)
+                if response is not None:
+                    writer.write(response)
+                    await writer.drain()
+        except (ConnectionError, ValueError):
+            pass  # Client went away, or sent a line longer than MAX_REQUEST
+        except asyncio.CancelledError:
+            pass  # The server is closing; ending normally keeps asyncio from reporting it
+        finally:
+            self._handlers.discard(handler)
+            self._subscribers.discard(writer)
+            writer.close()
+
+    def _dispatch(self, line: bytes, writer: asyncio.StreamWriter) -> Optional[bytes]:
+        """Run one request; returns the response, or None for notifications"""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return _encode({"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": "Parse error"}})
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                raise RpcError(INVALID_REQUEST, "Invalid request")
+            params = request.get("params", {})
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "params must be an object")
+            if request["method"] == "subscribe":
+                self._subscribers.add(writer)
+                result = self.rpc_version()
+            else:
+                method = self.methods.get(request["method"])
+                if method is None:
+                    raise RpcError(METHOD_NOT_FOUND, f"Method not found: {request['method']}")
+                try:
+                    result = method(**params)
+                except (TypeError, KeyError, ValueError) as e:
+                    raise RpcError(INVALID_PARAMS, f"Invalid params: {e}")
+                except Exception as e:
+                    # Whatever else a method runs into goes back to the client, not up the connection
+                    raise RpcError(INTERNAL_ERROR, f"Internal error: {e}")
+        except RpcError as e:
+            if isinstance(request, dict) and "id" not in request:
+                return None
+            return _encode({"jsonrpc": "2.0", "id": request_id, "error": {"code": e.code, "message": str(e)}})
+        if "id" not in request:
+            return None
+        return _encode({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+    # Methods; each mutation returns the version it produced, so callers can tell fresh views apart
+
+    def rpc_version(self) -> Dict:
+        return {"version": self.manager.version}
+
+    def rpc_list(self, status: Optional[str] = None, key: Optional[str] = None, descending: bool = False,
+                 query: str = "", offset: int = 0, limit: Optional[int] = None) -> Dict:
+        """Task dicts with ``status`` (a TaskStatus name, or None for all), ordered like get_ordered.
+        ``offset`` and ``limit`` pick a window of them, and ``total`` counts them all, so
+        ``limit=0`` just counts."""
+        if key not in SORT_KEYS:
+            raise ValueError(f"unknown sort key {key!r}")
+        if not isinstance(offset, int) or offset < 0 or limit is not None and (not isinstance(limit, int) or limit < 0):
+            raise ValueError("offset and limit must be non-negative integers")
+        task_status = _status(status)
+        if task_status != TaskStatus.TODO:
+            self.manager.load_archive()
+        tasks = self._view(task_status, key, descending, query)
+        window = tasks[offset:] if limit is None else tasks[offset:offset + limit]
+        return {"version": self.manager.version, "total": len(tasks), "tasks": [task.to_dict() for task in window]}
+
+    def _view(self, status: Optional[TaskStatus], key: Optional[str], descending: bool, query: str) -> List[Task]:
+        """The view a list call asks for, built once per version while clients page through it"""
+        view_key = (self.manager.version, status, key, descending, query)
+        tasks = self._views.get(view_key)
+        if tasks is not None:
+            self._views.move_to_end(view_key)
+            return tasks
+        if query:
+            tasks = self.manager.search(query, status, key, descending)
+        else:
+            tasks = self.manager.get_ordered(status, key, descending)
+        self._views[view_key] = tasks
+        if len(self._views) > VIEW_CACHE_SIZE:
+            self._views.popitem(last=False)
+        return tasks
+
+    def rpc_count(self) -> Dict:
+        return {status.name: len(self.manager.get_tasks(status)) for status in TaskStatus}
+
+    def rpc_stats(self) -> Dict:
+        """TaskStats.to_dict of the served tasks, plus the version they were counted at"""
+        result = self.manager.stats().to_dict()
+        result["version"] = self.manager.version
+        return result
+
+    def rpc_add(self, title: str, priority: str = "LOW") -> Dict:
+        if not isinstance(title, str):
+            raise TypeError("the title must be a string")
+        if not title.strip():
+            raise ValueError("the title must not be empty")
+        task = self.manager.add_task(title, Priority[priority])
+        return {"version": self.manager.version, "task": task.to_dict()}
+
+    def rpc_toggle(self, ids: List[str]) -> Dict:
+        self.manager.toggle_tasks_status_by_id(ids)
+        return self.rpc_version()
+
+    def rpc_set_title(self, id: str, title: str) -> Dict:
+        if not isinstance(title, str):
+            raise TypeError("the title must be a string")
+        self.manager.update_task_title_by_id(id, title)
+        return self.rpc_version()
+
+    def rpc_set_priority(self, ids: List[str], priority: str) -> Dict:
+        self.manager.update_tasks_priority_by_id(ids, Priority[priority])
+        return self.rpc_version()
+
+    def rpc_delete(self, ids: List[str]) -> Dict:
+        self.manager.delete_tasks_by_id(ids)
+        return self.rpc_version()
+
+
+def _current_task() -> asyncio.Task:
+    if hasattr(asyncio, "current_task"):
+        return asyncio.current_task()
+    return asyncio.Task.current_task()  # Python 3.6
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Remove a socket file left behind by a server that is no longer running"""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.remove(path)
+        return
+    finally:
+        probe.close()
+    raise OSError(f"a task server is already listening on {path}")
+
+
+def serve(manager: TaskManager, path: str) -> None:
+    """Serve ``manager`` on ``path`` until SIGINT or SIGTERM"""
+    import signal
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = TaskServer(manager, path)
+    try:
+        loop.run_until_complete(server.start())
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, loop.stop)
+        loop.run_forever()
+        loop.run_until_complete(server.close())
+    finally:
+        loop.close()
@@ -0,0 +1,669 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Collection, Dict, Iterator, List, Optional, Tuple
+
+from task_io import FileLock, atomic_write, file_signature, iter_json_array, write_json_atomic
+from task_journal import TaskJournal
+from task_model import Change, Priority, Task, TaskStatus
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+def _apply_to_dicts(tasks: Dict[str, Dict], record: Dict) -> None:
+    """Apply a journal record to stored task dicts keyed by id, like TaskManager does to tasks"""
+    try:
+        op = record["op"]
+        if op == "add":
+            task_data = record["task"]
+            tasks.setdefault(task_data.setdefault("id", uuid.uuid4().hex), task_data)
+            return
+        # Journals written before task ids existed address tasks by position
+        task_id = record["id"] if "id" in record else list(tasks)[record["index"]]
+        if op == "delete":
+            tasks.pop(task_id, None)
+        elif op in ("status", "priority", "title"):
+            tasks[task_id][op] = record["value"]
+    except (KeyError, IndexError, TypeError):
+        pass
+
+
+class TaskStorage:
+    """Where a TaskManager keeps its tasks. Subclasses pick the on-disk format."""
+
+    # Set by load when stored tasks had no id and were given one; cleared by save
+    migrated = False
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self, streaming: bool = False) -> Iterator[Task]:
+        """Yield stored tasks in list order with ``seq`` set, increasing"""
+        raise NotImplementedError
+
+    def replay(self, apply: Callable[[Dict], None], snapshot: Callable[[], List[Dict]]) -> None:
+        """Feed changes recorded after the last full save back through ``apply``"""
+
+    def commit(self, tasks: Collection[Task], changes: List[Change]) -> None:
+        """Persist ``changes``; ``tasks`` is the full list for backends that rewrite everything"""
+        raise NotImplementedError
+
+    def save(self, tasks: Collection[Task]) -> None:
+        """Replace everything stored with ``tasks``"""
+        raise NotImplementedError
+
+    def append(self, task: Task) -> bool:
+        """Store one new task without loading the others; False if the backend cannot"""
+        return self.append_many([task])
+
+    def append_many(self, tasks: List[Task]) -> bool:
+        """Store new tasks after the others in one write without loading them; False if the
+        backend cannot"""
+        return False
+
+    @contextmanager
+    def appending(self) -> Iterator[Optional[Callable[[List[Task]], None]]]:
+        """A function storing batches of new tasks after the others without loading them, or
+        None if the backend cannot. Everything stored is in place by the end of the block.
+
+        Not loading is not the same as not reading: SQLite and the journal add in constant
+        time, but a plain JSON file is copied whole once per block, so its cost still grows
+        with the file."""
+        yield None
+
+    def iter_stored(self) -> Optional[Iterator[Task]]:
+        """Every stored task in list order, read a few at a time so memory use stays flat,
+        or None if the backend can only produce them with a full load"""
+        return None
+
+    def count(self) -> Optional[Dict[TaskStatus, int]]:
+        """Number of tasks with each status without loading them, or None if the backend cannot"""
+        return None
+
+    def sync(self, apply: Callable[[Dict], None], merge: Callable[[List[Dict]], None]) -> bool:
+        """Bring in what other processes stored since this storage last read or wrote.
+
+        New journal records are passed to ``apply``. Backends that have to
+        re-read everything pass every stored task dict to ``merge`` instead.
+        Returns whether anything changed.
+        """
+        return False
+
+    def watched_paths(self) -> List[str]:
+        """Files whose changes may mean another process stored something"""
+        return [self.path]
+
+    def close(self) -> None:
+        pass
+
+
+class JsonStorage(TaskStorage):
+    """A JSON array of task dicts, rewritten on every change or journaled with TaskJournal.
+
+    Writes happen under an advisory lock on ``<path>.lock``. When another
+    process has written since the tasks in memory were last brought up to
+    date, ``commit`` replays its changes onto that version of the file
+    instead of overwriting it, and ``sync`` merges it into memory.
+    """
+
+    def __init__(self, path: str, journal: bool = False):
+        super().__init__(path)
+        self.lock = FileLock(path + ".lock")
+        self.journal = TaskJournal(path, lock=self.lock) if journal else None
+        # What the tasks in memory reflect: the snapshot file and how far into the journal
+        self._snapshot_signature: Optional[Tuple[int, int, int]] = None
+        self._journal_inode: Optional[int] = None
+        self._journal_offset = 0
+        # Set when a commit merged into another process's changes that memory has yet to see
+        self._stale = False
+
+    def load(self, streaming: bool = False) -> Iterator[Task]:
+        if self.journal is not None:
+            with self.lock:
+                self.journal.recover()
+        self._snapshot_signature = file_signature(self.path)
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            data = iter_json_array(f) if streaming else json.load(f)
+            for seq, task_data in enumerate(data):
+                task = Task.from_dict(task_data)
+                task.seq = seq
+                if "id" not in task_data:
+                    self.migrated = True
+                yield task
+
+    def replay(self, apply: Callable[[Dict], None], snapshot: Callable[[], List[Dict]]) -> None:
+        if self.journal is None:
+            return
+        with self.lock:
+            if self.journal.has_rotated():
+                for record in self.journal.read_rotated():
+                    apply(record)
+                self.journal.fold_rotated(snapshot())
+                self._snapshot_signature = file_signature(self.path)
+            for record in self.journal.read():
+                apply(record)
+            self._mark_journal_read()
+
+    def watched_paths(self) -> List[str]:
+        if self.journal is None:
+            return [self.path]
+        return [self.path, self.journal.path]
+
+    def _mark_journal_read(self) -> None:
+        self._journal_inode = self.journal.inode()
+        self._journal_offset = os.path.getsize(self.journal.path) if self._journal_inode is not None else 0
+
+    def _in_sync(self) -> bool:
+        """Whether nothing else has written since memory was last brought up to date"""
+        if self.journal is not None and self.journal.written_signature is not None:
+            # A compaction of ours finished; its snapshot holds nothing memory lacks
+            self._snapshot_signature = self.journal.written_signature
+            self.journal.written_signature = None
+        if self._stale or file_signature(self.path) != self._snapshot_signature:
+            return False
+        if self.journal is None:
+            return True
+        if self.journal.inode() != self._journal_inode:
+            return False
+        return self._journal_inode is None or os.path.getsize(self.journal.path) == self._journal_offset
+
+    def sync(self, apply: Callable[[Dict], None], merge: Callable[[List[Dict]], None]) -> bool:
+        with self.lock:
+            if self._in_sync():
+                return False
+            if (self.journal is not None and not self._stale and self._journal_inode is not None
+                    and file_signature(self.path) == self._snapshot_signature
+                    and self.journal.inode() == self._journal_inode):
+                # Only records were appended to the journal, so apply just those
+                records, self._journal_offset = self.journal.read_new(self._journal_offset)
+                for record in records:
+                    apply(record)
+                return bool(records)
+            merge(self._read_stored())
+            self._stale = False
+            return True
+
+    def _read_stored(self) -> List[Dict]:
+        """Every stored task dict with the journal applied, noting it all as read"""
+        self._snapshot_signature = file_signature(self.path)
+        tasks: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for task_data in json.load(f):
+                    tasks[task_data.setdefault("id", uuid.uuid4().hex)] = task_data
+        if self.journal is not None:
+            if self.journal.has_rotated():
+                for record in self.journal.read_rotated():
+                    _apply_to_dicts(tasks, record)
+            records, _ = self.journal.read_new(0)
+            for record in records:
+                _apply_to_dicts(tasks, record)
+            self._mark_journal_read()
+        return list(tasks.values())
+
+    def commit(self, tasks: Collection[Task], changes: List[Change]) -> None:
+        with self.lock:
+            in_sync = self._in_sync()
+            if self.journal is None:
+                if in_sync:
+                    write_json_atomic(self.path, [task.to_dict() for task in tasks])
+                else:
+                    # Write these changes into the other process's version rather than over it
+                    stored = {task_data["id"]: task_data for task_data in self._read_stored()}
+                    for change in changes:
+                        _apply_to_dicts(stored, self._record(change))
+                    write_json_atomic(self.path, list(stored.values()))
+                    self._stale = True
+                self._snapshot_signature = file_signature(self.path)
+                return
+            self.journal.extend(self._record(change) for change in changes)
+            if not in_sync:
+                # Leave the offset before the other process's records; sync applies them and
+                # then these again, which changes nothing as every record sets absolute values
+                return
+            self._mark_journal_read()
+            if self.journal.needs_compaction():
+                self.journal.compact([task.to_dict() for task in tasks])
+                self._mark_journal_read()
+
+    @staticmethod
+    def _record(change: Change) -> Dict:
+        if change.op == "add":
+            return {"op": "add", "task": change.task.to_dict()}
+        if change.op == "delete":
+            return {"op": "delete", "id": change.task.id}
+        if change.op == "status":
+            value = change.task.status.name
+        elif change.op == "priority":
+            value = change.task.priority.name
+        else:
+            value = change.task.title
+        return {"op": change.op, "id": change.task.id, "value": value}
+
+    def save(self, tasks: Collection[Task]) -> None:
+        with self.lock:
+            self.migrated = False
+            self._stale = False
+            snapshot = [task.to_dict() for task in tasks]
+            if self.journal is not None:
+                self.journal.compact(snapshot, background=False)
+                self._mark_journal_read()
+            else:
+                write_json_atomic(self.path, snapshot)
+            self._snapshot_signature = file_signature(self.path)
+
+    def append_many(self, tasks: List[Task]) -> bool:
+        with self.appending() as append:
+            if append is None:
+                return False
+            append(tasks)
+        return True
+
+    @contextmanager
+    def appending(self) -> Iterator[Optional[Callable[[List[Task]], None]]]:
+        """Journaled files append each batch to the journal. Plain files are copied up to
+        their closing bracket into a temp file, which takes the batches and replaces the file
+        at the end of the block; the lock is held throughout."""
+        if self.journal is not None:
+            yield self._journal_adds
+            return
+        with self.lock:
+            array_end = self._array_end()
+            if array_end is not None:
+                end, has_elements = array_end
+                with atomic_write(self.path, "wb") as f:
+                    if end > 0:
+                        with open(self.path, "rb") as source:
+                            remaining = end
+                            while remaining:
+                                chunk = source.read(min(remaining, 1 << 20))
+                                f.write(chunk)
+                                remaining -= len(chunk)
+                    else:
+                        f.write(b"[")
+                    # An array that already has elements continues after a comma
+                    separator = b"," if has_elements else b""
+
+                    def append(tasks: List[Task]) -> None:
+                        nonlocal separator
+                        if tasks:
+                            # The elements as save lays them out inside the array
+                            f.write(separator + json.dumps([task.to_dict() for task in tasks], indent=2)[1:-2].encode())
+                            separator = b","
+
+                    yield append
+                    f.write(b"\n]" if separator else b"]")
+                return
+        yield None
+
+    def _array_end(self) -> Optional[Tuple[int, bool]]:
+        """Where the data file's task array stops before its closing bracket, and whether it
+        has elements; (0, False) for no file, None if it does not end like a saved array"""
+        if not os.path.exists(self.path):
+            return 0, False
+        with open(self.path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            tail_start = max(0, size - 64)
+            f.seek(tail_start)
+            tail = f.read().rstrip()
+        before = tail[:-1].rstrip()
+        if not tail.endswith(b"]") or not before.endswith((b"}", b"[")):
+            return None
+        return tail_start + len(before), before.endswith(b"}")
+
+    def _journal_adds(self, tasks: List[Task]) -> None:
+        with self.lock:
+            self.journal.recover()
+            self.journal.extend({"op": "add", "task": task.to_dict()} for task in tasks)
+
+    def _snapshot_is_current(self) -> bool:
+        """Whether the snapshot file alone holds every task, with no journal to replay"""
+        return self.journal is None or not any(
+            os.path.exists(path) for path in (self.journal.path, self.journal.rotated_path,
+                                              self.journal.compact_path))
+
+    def iter_stored(self) -> Optional[Iterator[Task]]:
+        if not self._snapshot_is_current():
+            return None
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                first = next(iter_json_array(f), None)
+            # Files saved before tasks had ids lack them throughout; a full load assigns and saves them
+            if isinstance(first, dict) and "id" not in first:
+                return None
+        return self.load(streaming=True)
+
+    def count(self) -> Optional[Dict[TaskStatus, int]]:
+        if not self._snapshot_is_current():
+            # The snapshot alone is out of date until the journal is replayed
+            return None
+        counts = {status: 0 for status in TaskStatus}
+        if not os.path.exists(self.path):
+            return counts
+        with open(self.path, "rb") as f:
+            data = f.read()
+        # Quotes inside strings are escaped, so these can only match a status key and its
+        # value, in the spacing save writes or without spaces
+        for status in TaskStatus:
+            counts[status] = sum(data.count(b'"status"%s"%s"' % (separator, status.name.encode()))
+                                 for separator in (b": ", b":"))
+        return counts
+
+    def close(self) -> None:
+        if self.journal is not None:
+            self.journal.close()
+
+
+class SqliteStorage(TaskStorage):
+    """One row per task with indexed status, priority and creation time columns.
+
+    Mutations touch only their own row, and ``count`` answers from the status
+    index without loading anything into Python. Rows are updated by task id,
+    so several processes can share a database; ``sync`` picks up what the
+    others committed.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            seq INTEGER PRIMARY KEY,
+            id TEXT,
+            title TEXT NOT NULL,
+            creation_date TEXT NOT NULL,
+            created INTEGER NOT NULL,
+            priority INTEGER NOT NULL,
+            status TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS tasks_id ON tasks (id);
+        CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, seq);
+        CREATE INDEX IF NOT EXISTS tasks_status_priority ON tasks (status, priority, seq);
+        CREATE INDEX IF NOT EXISTS tasks_status_created ON tasks (status, created, seq);
+        CREATE INDEX IF NOT EXISTS tasks_priority ON tasks (priority, seq);
+        CREATE INDEX IF NOT EXISTS tasks_created ON tasks (created, seq);
+    """
+
+    # Named columns, since databases migrated with ALTER TABLE have id last
+    INSERT_COLUMNS = "(seq, id, title, creation_date, created, priority, status) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+    # A new row goes after every row, including ones other processes added since this one loaded
+    ADD = ("INSERT OR REPLACE INTO tasks (seq, id, title, creation_date, created, priority, status) "
+           "VALUES ((SELECT MAX(COALESCE(MAX(seq) + 1, 0), ?) FROM tasks), ?, ?, ?, ?, ?, ?)")
+
+    # Rows per query when streaming a load
+    LOAD_CHUNK = 4096
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        # The connection is shared with the background loader thread, so serialize access
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(tasks)")]
+            if columns and "id" not in columns:
+                # Databases created before task ids existed
+                self._connection.execute("ALTER TABLE tasks ADD COLUMN id TEXT")
+            self._connection.executescript(self.SCHEMA)
+        # Changes whenever another connection commits, which is how sync spots external changes
+        self._data_version = self._read_data_version()
+
+    def _read_data_version(self) -> int:
+        return self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self, streaming: bool = False) -> Iterator[Task]:
+        select = "SELECT seq, id, title, creation_date, priority, status FROM tasks"
+        with self._lock:
+            self._data_version = self._read_data_version()
+            if streaming:
+                rows = self._connection.execute(select + " ORDER BY seq LIMIT ?", (self.LOAD_CHUNK,)).fetchall()
+            else:
+                rows = self._connection.execute(select + " ORDER BY seq").fetchall()
+        while rows:
+            for seq, task_id, title, creation_date, priority, status in rows:
+                task = Task(title, Priority(priority), TaskStatus[status], created=0, task_id=task_id)
+                task.creation_date = creation_date
+                task.seq = seq
+                if task_id is None:
+                    self.migrated = True
+                yield task
+            if not streaming:
+                return
+            # Each chunk is its own query, so nothing stays locked while the caller works
+            with self._lock:
+                rows = self._connection.execute(select + " WHERE seq > ? ORDER BY seq LIMIT ?",
+                                                (rows[-1][0], self.LOAD_CHUNK)).fetchall()
+
+    def iter_stored(self) -> Optional[Iterator[Task]]:
+        with self._lock:
+            unmigrated = self._connection.execute("SELECT 1 FROM tasks WHERE id IS NULL LIMIT 1").fetchone()
+        # Rows from before tasks had ids get them, and keep them, only through a full load
+        return None if unmigrated is not None else self.load(streaming=True)
+
+    def commit(self, tasks: Collection[Task], changes: List[Change]) -> None:
+        with self._lock, self._connection:
+            for change in changes:
+                task = change.task
+                if change.op == "add":
+                    self._connection.execute(self.ADD, self._row(task))
+                elif change.op == "delete":
+                    self._connection.execute("DELETE FROM tasks WHERE id = ?", (task.id,))
+                elif change.op == "status":
+                    self._connection.execute(
+                        "UPDATE tasks SET status = ? WHERE id = ?", (task.status.name, task.id))
+                elif change.op == "priority":
+                    self._connection.execute(
+                        "UPDATE tasks SET priority = ? WHERE id = ?", (task.priority.value, task.id))
+                elif change.op == "title":
+                    self._connection.execute("UPDATE tasks SET title = ? WHERE id = ?", (task.title, task.id))
+
+    @staticmethod
+    def _row(task: Task) -> tuple:
+        return (task.seq, task.id, task.title, task.creation_date, task.created, task.priority.value, task.status.name)
+
+    def save(self, tasks: Collection[Task]) -> None:
+        self.migrated = False
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM tasks")
+            self._connection.executemany(
+                "INSERT INTO tasks " + self.INSERT_COLUMNS, (self._row(task) for task in tasks))
+
+    @contextmanager
+    def appending(self) -> Iterator[Optional[Callable[[List[Task]], None]]]:
+        yield self.append_many
+
+    def append_many(self, tasks: List[Task]) -> bool:
+        # INSERT OR REPLACE would overwrite a task with the same id; callers add only new ones
+        with self._lock, self._connection:
+            self._connection.executemany(self.ADD, map(self._row, tasks))
+        return True
+
+    def sync(self, apply: Callable[[Dict], None], merge: Callable[[List[Dict]], None]) -> bool:
+        with self._lock:
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return False
+            rows = self._connection.execute(
+                "SELECT id, title, creation_date, priority, status FROM tasks ORDER BY seq").fetchall()
+            self._data_version = data_version
+        merge([{"id": task_id, "title": title, "creation_date": creation_date,
+                "priority": Priority(priority).name, "status": status}
+               for task_id, title, creation_date, priority, status in rows])
+        return True
+
+    def watched_paths(self) -> List[str]:
+        # Other connections may commit to the write-ahead log without touching the database file
+        return [self.path, self.path + "-wal"]
+
+    def count(self) -> Optional[Dict[TaskStatus, int]]:
+        counts = {status: 0 for status in TaskStatus}
+        with self._lock:
+            for status, count in self._connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"):
+                counts[TaskStatus[status]] = count
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class WriteBehindStorage(TaskStorage):
+    """Wraps another storage and persists changes from a background thread.
+
+    ``commit`` only queues changes, so callers never wait on the disk. The
+    writer coalesces everything queued into at most one write per
+    ``interval`` seconds. ``close`` flushes whatever is still pending.
+    """
+
+    def __init__(self, inner: TaskStorage, interval: float = 1.0):
+        super().__init__(inner.path)
+        self.inner = inner
+        self.interval = interval
+        self._pending: List[Change] = []
+        self._tasks: Collection[Task] = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closing = False
+        self._writer = threading.Thread(target=self._run, daemon=True)
+        self._writer.start()
+
+    @property
+    def migrated(self) -> bool:
+        return self.inner.migrated
+
+    def load(self, streaming: bool = False) -> Iterator[Task]:
+        return self.inner.load(streaming)
+
+    def replay(self, apply: Callable[[Dict], None], snapshot: Callable[[], List[Dict]]) -> None:
+        self.inner.replay(apply, snapshot)
+
+    def commit(self, tasks: Collection[Task], changes: List[Change]) -> None:
+        # ``tasks`` may be the manager's live dict view; copy it here, on the thread that
+        # changes it, since iterating it on the writer could meet a resize mid-way
+        snapshot = list(tasks)
+        with self._condition:
+            self._tasks = snapshot
+            self._pending.extend(changes)
+            self._condition.notify()
+
+    def save(self, tasks: Collection[Task]) -> None:
+        self.flush()
+        self.inner.save(tasks)
+
+    def sync(self, apply: Callable[[Dict], None], merge: Callable[[List[Dict]], None]) -> bool:
+        # Queued changes go out first, so they are merged into rather than over
+        try:
+            self.flush()
+        except (OSError, sqlite3.Error):
+            pass  # Still queued; they are applied on top of whatever sync brings in
+        return self.inner.sync(apply, merge)
+
+    def watched_paths(self) -> List[str]:
+        return self.inner.watched_paths()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closing)
+                # Give a burst of edits one interval to pile up before writing
+                self._condition.wait_for(lambda: self._closing, timeout=self.interval)
+                if self._closing:
+                    return
+            try:
+                self.flush()
+            except (OSError, sqlite3.Error):
+                pass  # The changes were put back; the next flush retries them
+
+    def flush(self) -> None:
+        """Write all pending changes now"""
+        with self._flush_lock:
+            with self._condition:
+                changes, self._pending = self._pending, []
+                tasks = self._tasks
+            if not changes:
+                return
+            try:
+                self.inner.commit(tasks, changes)
+            except Exception:
+                with self._condition:
+                    self._pending[:0] = changes
+                raise
+
+    def close(self) -> None:
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._writer.join()
+        self.flush()
+        self.inner.close()
+
+
+class ProfilingStorage(TaskStorage):
+    """Wraps another storage and reports how long each load, commit and save takes.
+
+    ``record(name, seconds)`` is called with "load", "save" (for commits and
+    full saves alike) or "sync" (only when it brought in changes). Wrap the storage that does the actual
+    writing, i.e. inside any WriteBehindStorage, to time the disk and not the queue.
+    """
+
+    def __init__(self, inner: TaskStorage, record: Callable[[str, float], None]):
+        super().__init__(inner.path)
+        self.inner = inner
+        self.record = record
+
+    @property
+    def migrated(self) -> bool:
+        return self.inner.migrated
+
+    def load(self, streaming: bool = False) -> Iterator[Task]:
+        started = time.perf_counter()
+        yield from self.inner.load(streaming)
+        self.record("load", time.perf_counter() - started)
+
+    def replay(self, apply: Callable[[Dict], None], snapshot: Callable[[], List[Dict]]) -> None:
+        self.inner.replay(apply, snapshot)
+
+    def commit(self, tasks: Collection[Task], changes: List[Change]) -> None:
+        started = time.perf_counter()
+        self.inner.commit(tasks, changes)
+        self.record("save", time.perf_counter() - started)
+
+    def save(self, tasks: Collection[Task]) -> None:
+        started = time.perf_counter()
+        self.inner.save(tasks)
+        self.record("save", time.perf_counter() - started)
+
+    def sync(self, apply: Callable[[Dict], None], merge: Callable[[List[Dict]], None]) -> bool:
+        started = time.perf_counter()
+        changed = self.inner.sync(apply, merge)
+        if changed:
+            self.record("sync", time.perf_counter() - started)
+        return changed
+
+    def watched_paths(self) -> List[str]:
+        return self.inner.watched_paths()
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def backend_for(path: str, backend: Optional[str] = None) -> str:
+    """Name of the backend to use for ``path``: ``backend`` if given, else by extension"""
+    if backend is not None:
+        return backend
+    if os.path.splitext(path)[1].lower() in SQLITE_EXTENSIONS:
+        return "sqlite"
+    return "json"
+
+
+def open_storage(path: str, backend: Optional[str] = None, journal: bool = False) -> TaskStorage:
+    """The storage for ``path``, creating the directory it goes in"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if backend_for(path, backend) == "sqlite":
+        return SqliteStorage(path)
+    return JsonStorage(path, journal=journal)
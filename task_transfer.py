@@ -0,0 +1,164 @@
+import csv
+import json
+import os
+import uuid
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from task_io import iter_json_array
+from task_model import Priority, Task, TaskStatus, parse_date
+
+FORMATS = ("json", "ndjson", "csv")
+
+# CSV columns, in to_dict order
+FIELDS = ("id", "title", "creation_date", "priority", "status")
+
+FORMAT_EXTENSIONS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+# Records without an id get one derived from their content, so importing the same file
+# twice does not add its tasks twice
+IMPORT_NAMESPACE = uuid.UUID("6f1c2f8e-4b7a-4d52-9a0e-3c5d7b1e2a90")
+
+# Invalid records described in an ImportReport; the rest are only counted
+MAX_ERRORS = 10
+
+
+def format_for(path: Optional[str]) -> str:
+    """Format of the file at ``path`` going by its extension; json for anything else and stdio"""
+    if path is None or path == "-":
+        return "json"
+    return FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower(), "json")
+
+
+def read_records(f: IO[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """(position, record) for each record in ``f``, reading one at a time. The position is the
+    line number, or the array index from 1 for json. A record that cannot be decoded comes
+    as the ValueError saying why."""
+    if fmt == "json":
+        # A broken array cannot be resynchronized, so its decode error ends the import
+        yield from enumerate(iter_json_array(f), 1)
+    elif fmt == "ndjson":
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except ValueError as e:
+                    yield number, e
+    else:
+        reader = csv.DictReader(f)
+        for row in reader:
+            # Empty cells count as missing; extra cells land under the None key
+            yield reader.line_num, {key: value for key, value in row.items() if key is not None and value}
+
+
+def write_records(f: IO[str], fmt: str, records: Iterable[Dict]) -> None:
+    """Write task dicts to ``f`` one at a time; json comes out the way save formats it"""
+    if fmt == "csv":
+        writer = csv.DictWriter(f, FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(records)
+    elif fmt == "ndjson":
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    else:
+        separator = ""
+        f.write("[")
+        for record in records:
+            # The element as json.dump(..., indent=2) lays it out inside the array
+            f.write(separator + json.dumps([record], indent=2)[1:-2])
+            separator = ","
+        f.write("\n]" if separator else "]")
+
+
+def _member(enum, value: Any, what: str):
+    if not isinstance(value, str) or value.upper() not in enum.__members__:
+        raise ValueError(f"unknown {what} {value!r}")
+    return enum[value.upper()]
+
+
+def task_from_record(record: Any) -> Task:
+    """The task an imported record describes; raises ValueError saying what is wrong with it.
+
+    Only the title is required. Priority and status names may be in any case and default
+    to LOW and TODO; a missing creation date means now. Without an id, the task gets one
+    derived from the title and creation date, or from the title, priority and status when
+    there is no date either."""
+    if not isinstance(record, dict):
+        raise ValueError("not an object")
+    title = record.get("title")
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("missing title")
+    task = Task(title, _member(Priority, record.get("priority", "LOW"), "priority"),
+                _member(TaskStatus, record.get("status", "TODO"), "status"))
+    creation_date = record.get("creation_date")
+    if creation_date is not None:
+        if not isinstance(creation_date, str):
+            raise ValueError(f"invalid creation_date {creation_date!r}")
+        try:
+            parse_date(creation_date)
+        except ValueError:
+            raise ValueError(f"invalid creation_date {creation_date!r}") from None
+        task.creation_date = creation_date
+    task_id = record.get("id")
+    if task_id is not None:
+        if not isinstance(task_id, str) or not task_id:
+            raise ValueError(f"invalid id {task_id!r}")
+        task.id = task_id
+    elif creation_date is not None:
+        task.id = uuid.uuid5(IMPORT_NAMESPACE, creation_date + "\n" + title).hex
+    else:
+        # Led by an empty date, so it never matches a dated record's name
+        name = "\n".join(("", title, task.priority.name, task.status.name))
+        task.id = uuid.uuid5(IMPORT_NAMESPACE, name).hex
+    return task
+
+
+class ImportReport:
+    """What an import did: counts, and (position, message) for the first invalid records"""
+
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors: List[Tuple[int, str]] = []
+
+
+def import_records(records: Iterable[Tuple[int, Any]], known_ids: Set[str],
+                   write: Callable[[List[Task]], None], batch_size: int = 1000) -> ImportReport:
+    """Validate ``records`` from read_records and pass the new tasks to ``write``, at most
+    ``batch_size`` at a time. A record whose id is in ``known_ids`` or came earlier in the
+    input is skipped; ``known_ids`` gains the id of every task written. If reading ``records``
+    fails, the tasks before the failure are written before the error is raised."""
+    report = ImportReport()
+    batch: List[Task] = []
+    records = iter(records)
+    while True:
+        try:
+            position, record = next(records)
+        except StopIteration:
+            break
+        except ValueError:
+            if batch:
+                write(batch)
+            raise
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            task = task_from_record(record)
+        except ValueError as e:
+            report.invalid += 1
+            if len(report.errors) < MAX_ERRORS:
+                report.errors.append((position, str(e)))
+            continue
+        if task.id in known_ids:
+            report.duplicates += 1
+            continue
+        known_ids.add(task.id)
+        batch.append(task)
+        if len(batch) >= batch_size:
+            write(batch)
+            report.imported += len(batch)
+            batch = []
+    if batch:
+        write(batch)
+        report.imported += len(batch)
+    return report
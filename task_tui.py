@@ -1,10 +1,17 @@
 import curses
+import os
+import selectors
+import signal
 import sys
+import time
+from collections import OrderedDict
 from curses import wrapper
-from typing import List, Tuple, Dict
+from typing import List, Optional, Set, Tuple, Dict
 from enum import Enum
 
-from task_model import Priority, TaskManager, TaskStatus
+from task_model import AGE_BUCKETS, Priority, Task, TaskManager, TaskStatus
+from task_profile import Profiler, hud_lines
+from task_watch import FileWatcher
 
 
 class SortMode(Enum):
@@ -15,16 +22,66 @@ class SortMode(Enum):
     DATE_DESC = 4
 
 
+# TaskManager.get_ordered arguments (key, descending) for each sort mode
+SORT_KEYS = {
+    SortMode.NONE: (None, False),
+    SortMode.PRIORITY_ASC: ("priority", False),
+    SortMode.PRIORITY_DESC: ("priority", True),
+    SortMode.DATE_ASC: ("creation_date", False),
+    SortMode.DATE_DESC: ("creation_date", True),
+}
+
+# Header label of each age bucket, e.g. <7d, with the last one open-ended like 30d+
+AGE_LABELS = [f"<{days}d" if days is not None else f"{AGE_BUCKETS[-2][1]}d+" for _, days in AGE_BUCKETS]
+
+
 class TaskTUI:
-    def __init__(self, stdscr, task_manager: TaskManager):
+    # Most formatted rows kept for reuse; enough for scrolling back and forth through a long list
+    ROW_CACHE_SIZE = 4096
+
+    def __init__(self, stdscr, task_manager: TaskManager, profiler: Optional[Profiler] = None):
         self.stdscr = stdscr
         self.task_manager = task_manager
+        # Frame timings are always recorded; passing a profiler also shows the timing HUD
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.show_hud = profiler is not None
         self.current_row = 0
         self.top_line = 0
         self.filter_status = TaskStatus.TODO  # Default: show only todos
         self.sort_mode = SortMode.PRIORITY_DESC  # Default: sort by priority descending
         self.running = True
         
+        # Title search narrowing the view; typing goes to the query while searching is True
+        self.search_query = ""
+        self.searching = False
+        
+        # Ids of marked tasks, and the view row where a range selection started
+        self.marked: Set[str] = set()
+        self.range_anchor: Optional[int] = None
+        
+        # Header statistics and the (version, minute) they were read at; ages move with the clock
+        self._stats_text = ""
+        self._stats_key: Optional[Tuple[int, int]] = None
+        
+        # Cached filtered/sorted view and the (version, filter, sort, search) key it was built for
+        self._view: List[Task] = []
+        self._view_key = None
+        # View rebuild time since the last frame, wherever the rebuilds happened, and when the
+        # input the next frame answers arrived; both go into that frame's timings
+        self._view_time = 0.0
+        self._frame_started: Optional[float] = None
+        
+        # Segments last drawn on each screen row, used to skip unchanged rows
+        self._screen_rows: Dict[int, Tuple] = {}
+        self._screen_size = (0, 0)
+        
+        # Row strings by (id, title, status, priority, width), least recently used first. The
+        # displayed fields act as the task's version, so an edit simply misses the cache.
+        self._row_cache: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+        
+        # Digits typed before a jump key, as in 50% or 100G
+        self.count_prefix = ""
+        
         # Initialize colors
         curses.start_color()
         curses.use_default_colors()
@@ -39,7 +96,19 @@ class TaskTUI:
         
         # Set up key handling
         self.stdscr.keypad(True)
-        self.stdscr.timeout(100)  # For handling resize
+        
+        # The main loop sleeps in a selector until input arrives or wake() is called
+        self.dirty = True
+        self.selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._resized = False
+        
+        # Other processes' changes to the task files are merged in as they happen
+        self.watcher: Optional[FileWatcher] = None
+        self._sync_pending = False
+        self._last_poll = 0.0
 
     def get_priority_color(self, priority: Priority) -> int:
         if priority == Priority.HIGH:
@@ -55,43 +124,126 @@ class TaskTUI:
         else:
             return curses.color_pair(1)
 
-    def get_filtered_and_sorted_tasks(self) -> List:
-        """Get tasks with both filtering and sorting applied, including original indices"""
-        # First, get all tasks with their original indices
-        all_tasks_with_indices = [(i, task) for i, task in enumerate(self.task_manager.tasks)]
-        
-        # Apply filtering if needed
-        if self.filter_status is not None:
-            all_tasks_with_indices = [(i, task) for i, task in all_tasks_with_indices 
-                                     if task.status == self.filter_status]
-        
-        # Apply sorting if needed
-        if self.sort_mode != SortMode.NONE:
-            if self.sort_mode == SortMode.PRIORITY_ASC:
-                all_tasks_with_indices = sorted(all_tasks_with_indices, key=lambda x: x[1].priority.value)
-            elif self.sort_mode == SortMode.PRIORITY_DESC:
-                all_tasks_with_indices = sorted(all_tasks_with_indices, key=lambda x: x[1].priority.value, reverse=True)
-            elif self.sort_mode == SortMode.DATE_ASC:
-                all_tasks_with_indices = sorted(all_tasks_with_indices, key=lambda x: x[1].creation_date)
-            elif self.sort_mode == SortMode.DATE_DESC:
-                all_tasks_with_indices = sorted(all_tasks_with_indices, key=lambda x: x[1].creation_date, reverse=True)
-        
-        return all_tasks_with_indices
+    def get_filtered_and_sorted_tasks(self) -> List[Task]:
+        """Get tasks with both filtering and sorting applied"""
+        manager = self.task_manager
+        if self.filter_status != TaskStatus.TODO and not manager.archive_loaded and not manager.loading:
+            # Archived tasks are all DONE, so only these views need them
+            manager.load_archive()
+        view_key = (self.task_manager.version, self.filter_status, self.sort_mode, self.search_query)
+        if view_key != self._view_key:
+            # Edits rebuild the view while handling keys, before any frame starts
+            started = time.perf_counter()
+            self._view = self.build_view()
+            self._view_key = view_key
+            self._view_time += time.perf_counter() - started
+        return self._view
+
+    def build_view(self) -> List[Task]:
+        """Read the filtered and sorted tasks from the TaskManager indexes"""
+        key, descending = SORT_KEYS[self.sort_mode]
+        if self.search_query:
+            return self.task_manager.search(self.search_query, self.filter_status, key, descending)
+        return self.task_manager.get_ordered(self.filter_status, key, descending)
+
+    def get_stats_text(self) -> str:
+        """Task counts, completion rate and open task ages for the header"""
+        stats_key = (self.task_manager.version, int(time.time() // 60))
+        if stats_key != self._stats_key:
+            stats = self.task_manager.stats()
+            by_priority = " ".join(f"{priority.name[0]}{stats.count(TaskStatus.TODO, priority)}"
+                                   for priority in reversed(Priority))
+            ages = " ".join(f"{label}:{count}" for label, count in zip(AGE_LABELS, stats.ages))
+            self._stats_text = (f"Todo {stats.count(TaskStatus.TODO)} ({by_priority})  "
+                                f"Done {stats.count(TaskStatus.DONE)}  {stats.completion_rate:.0%} complete  "
+                                f"Age {ages}")
+            self._stats_key = stats_key
+        return self._stats_text
 
     def get_visible_tasks(self) -> List:
         tasks = self.get_filtered_and_sorted_tasks()
         max_y, _ = self.stdscr.getmaxyx()
         return tasks[self.top_line:self.top_line + max_y - 4]  # Leave space for header and footer
 
-    def get_original_index(self, display_index: int) -> int:
-        """Gets the original task list index from the display index (accounts for sorting and filtering)"""
+    def get_selected_task(self) -> Optional[Task]:
+        """The task under the cursor, if any"""
+        tasks = self.get_filtered_and_sorted_tasks()
+        if 0 <= self.current_row < len(tasks):
+            return tasks[self.current_row]
+        return None
+
+    def range_rows(self) -> Tuple[int, int]:
+        """First and last view row of the range selection, or an empty range"""
+        if self.range_anchor is None:
+            return (0, -1)
+        return (min(self.range_anchor, self.current_row), max(self.range_anchor, self.current_row))
+
+    def get_selected_ids(self) -> Set[str]:
+        """Ids of the marked tasks plus the range selection"""
+        ids = set(self.marked)
+        first, last = self.range_rows()
+        if last >= 0:
+            ids.update(task.id for task in self.get_filtered_and_sorted_tasks()[first:last + 1])
+        return ids
+
+    def end_range(self) -> None:
+        """Turn the range selection into marks, e.g. before the view changes under it"""
+        first, last = self.range_rows()
+        if last >= 0:
+            self.marked.update(task.id for task in self.get_filtered_and_sorted_tasks()[first:last + 1])
+        self.range_anchor = None
+
+    def clear_selection(self) -> None:
+        self.marked.clear()
+        self.range_anchor = None
+
+    def toggle_mark_all(self) -> None:
+        """Mark every task in the view, or unmark them all if they already are"""
+        ids = {task.id for task in self.get_filtered_and_sorted_tasks()}
+        if ids <= self.marked:
+            self.marked -= ids
+        else:
+            self.marked |= ids
+
+    def clamp_cursor(self) -> None:
+        """Keep the cursor and scroll position inside the view after tasks disappear from it"""
         tasks = self.get_filtered_and_sorted_tasks()
-        if 0 <= display_index < len(tasks):
-            # The first element of each tuple is the original index
-            return tasks[display_index][0]
-        return -1
+        if self.current_row >= len(tasks):
+            self.current_row = max(0, len(tasks) - 1)
+        if self.top_line > self.current_row:
+            self.top_line = self.current_row
+
+    def view_height(self) -> int:
+        """Number of task rows on screen"""
+        max_y, _ = self.stdscr.getmaxyx()
+        return max(1, max_y - 4)
+
+    def move_to(self, row: int) -> None:
+        """Put the cursor on view row ``row``, scrolling only as far as needed to show it"""
+        count = len(self.get_filtered_and_sorted_tasks())
+        self.current_row = max(0, min(row, count - 1))
+        height = self.view_height()
+        if self.current_row < self.top_line:
+            self.top_line = self.current_row
+        elif self.current_row >= self.top_line + height:
+            self.top_line = self.current_row - height + 1
+
+    def scroll_page(self, pages: int) -> None:
+        """Move the view and the cursor by whole screens, keeping the cursor's place on screen"""
+        count = len(self.get_filtered_and_sorted_tasks())
+        height = self.view_height()
+        offset = self.current_row - self.top_line
+        self.top_line = max(0, min(self.top_line + pages * height, count - height))
+        self.move_to(self.top_line + offset)
+
+    def jump_to_percent(self, percent: int) -> None:
+        count = len(self.get_filtered_and_sorted_tasks())
+        self.move_to((count - 1) * min(percent, 100) // 100)
+        # Center the target when possible, like vim
+        self.top_line = max(0, min(self.current_row - self.view_height() // 2, count - self.view_height()))
 
     def cycle_sort_mode(self, sort_type: str) -> None:
+        self.end_range()
         # Reset cursor position when changing sort mode
         self.current_row = 0
         self.top_line = 0
@@ -168,16 +320,11 @@ class TaskTUI:
         curses.curs_set(0)
 
     def edit_task_title_prompt(self) -> None:
-        tasks = self.get_filtered_and_sorted_tasks()
-        if not tasks or not (0 <= self.current_row < len(tasks)):
-            return
-        
-        # Get the original task index
-        task_index = self.get_original_index(self.current_row)
-        if task_index < 0:
+        task = self.get_selected_task()
+        if task is None:
             return
             
-        current_title = tasks[self.current_row][1].title
+        current_title = task.title
         
         # Show prompt
         curses.echo()
@@ -212,22 +359,17 @@ class TaskTUI:
         
         # Update the task title
         if title != current_title:
-            self.task_manager.update_task_title(task_index, title)
+            self.task_manager.update_task_title_by_id(task.id, title)
         
         curses.noecho()
         curses.curs_set(0)
 
     def edit_task_priority_prompt(self) -> None:
-        tasks = self.get_filtered_and_sorted_tasks()
-        if not tasks or not (0 <= self.current_row < len(tasks)):
+        task = self.get_selected_task()
+        if task is None:
             return
             
-        # Get the original task index
-        task_index = self.get_original_index(self.current_row)
-        if task_index < 0:
-            return
-            
-        current_priority = tasks[self.current_row][1].priority
+        current_priority = task.priority
         
         # Show prompt
         prompt = f"Current priority: {current_priority.name}. Select new priority (1=Low, 2=Medium, 3=High, ESC to cancel): "
@@ -251,15 +393,84 @@ class TaskTUI:
         
         # Update the task priority
         if new_priority != current_priority:
-            self.task_manager.update_task_priority(task_index, new_priority)
+            self.task_manager.update_task_priority_by_id(task.id, new_priority)
+
+    def bulk_priority_prompt(self, task_ids: Set[str]) -> None:
+        prompt = f"Set priority of {len(task_ids)} tasks (1=Low, 2=Medium, 3=High, ESC to cancel): "
+        self.stdscr.addstr(0, 0, prompt.ljust(curses.COLS))
+        self.stdscr.clrtoeol()
+        self.stdscr.refresh()
+        
+        while True:
+            key = self.stdscr.getch()
+            if key == 27:  # ESC
+                return
+            elif key == 49:  # 1
+                new_priority = Priority.LOW
+                break
+            elif key == 50:  # 2
+                new_priority = Priority.MEDIUM
+                break
+            elif key == 51:  # 3
+                new_priority = Priority.HIGH
+                break
+        
+        self.task_manager.update_tasks_priority_by_id(task_ids, new_priority)
+        self.clear_selection()
 
     def handle_input(self) -> None:
-        tasks = self.get_filtered_and_sorted_tasks()
         key = self.stdscr.getch()
+        if key != -1:
+            self.handle_key(key)
+
+    def handle_search_key(self, key: int) -> bool:
+        """Edit the search query as the user types; False for keys that are not part of it"""
+        if key == 27:  # ESC clears the search
+            self.searching = False
+            self.set_search_query("")
+        elif key == 10:  # Enter keeps the results and returns to the normal keys
+            self.searching = False
+        elif key == curses.KEY_BACKSPACE or key == 127:
+            self.set_search_query(self.search_query[:-1])
+        elif 32 <= key <= 126:  # Printable characters
+            self.set_search_query(self.search_query + chr(key))
+        else:
+            return False
+        return True
+
+    def set_search_query(self, query: str) -> None:
+        if query != self.search_query:
+            self.end_range()
+            self.search_query = query
+            self.current_row = 0
+            self.top_line = 0
+
+    def handle_key(self, key: int) -> None:
+        self.dirty = True
+        if self.searching and self.handle_search_key(key):
+            return
+        tasks = self.get_filtered_and_sorted_tasks()
+        count_prefix, self.count_prefix = self.count_prefix, ""
         
-        if key == curses.KEY_RESIZE:
+        if ord('0') <= key <= ord('9') and (count_prefix or key != ord('0')):
+            self.count_prefix = count_prefix + chr(key)
+        elif key == ord('%') and count_prefix:
+            self.jump_to_percent(int(count_prefix))
+        elif key == ord('g') or key == curses.KEY_HOME:
+            self.move_to(0)
+        elif key == ord('G') or key == curses.KEY_END:
+            # With a count, go to that row number instead
+            self.move_to(int(count_prefix) - 1 if count_prefix else len(tasks) - 1)
+        elif count_prefix and key in (ord('j'), curses.KEY_DOWN, ord('k'), curses.KEY_UP):
+            step = int(count_prefix)
+            self.move_to(self.current_row + (step if key in (ord('j'), curses.KEY_DOWN) else -step))
+        elif key == curses.KEY_NPAGE or key == 6:  # Ctrl-F
+            self.scroll_page(1)
+        elif key == curses.KEY_PPAGE or key == 2:  # Ctrl-B
+            self.scroll_page(-1)
+        elif key == curses.KEY_RESIZE:
             # Handle terminal resize
-            self.stdscr.clear()
+            self.invalidate_screen()
         elif key == ord('q'):
             self.running = False
         elif key == ord('j') or key == curses.KEY_DOWN:
@@ -275,35 +486,65 @@ class TaskTUI:
                     self.top_line -= 1
         elif key == ord('a'):
             self.add_task_prompt()
+            self.invalidate_rows(0, 1)
         elif key == ord('e'):
             self.edit_task_title_prompt()
+            self.invalidate_rows(0, 1)
         elif key == ord('p'):
-            self.edit_task_priority_prompt()
+            selected_ids = self.get_selected_ids()
+            if selected_ids:
+                self.bulk_priority_prompt(selected_ids)
+            else:
+                self.edit_task_priority_prompt()
+            self.invalidate_rows(0, 1)
         elif key == ord('d'):
-            if tasks and 0 <= self.current_row < len(tasks):
-                # Get the original task index for deletion
-                task_index = self.get_original_index(self.current_row)
-                if task_index >= 0:
-                    self.task_manager.delete_task(task_index)
-                    # Adjust cursor if needed
+            selected_ids = self.get_selected_ids()
+            task = self.get_selected_task()
+            if selected_ids:
+                self.task_manager.delete_tasks_by_id(selected_ids)
+                self.clear_selection()
+                self.clamp_cursor()
+            elif task is not None:
+                self.task_manager.delete_task_by_id(task.id)
+                # Adjust cursor if needed
+                tasks_after = self.get_filtered_and_sorted_tasks()
+                if self.current_row >= len(tasks_after):
+                    self.current_row = max(0, len(tasks_after) - 1)
+        elif key == ord(' '):
+            selected_ids = self.get_selected_ids()
+            task = self.get_selected_task()
+            if selected_ids:
+                self.task_manager.toggle_tasks_status_by_id(selected_ids)
+                self.clear_selection()
+                self.clamp_cursor()
+            elif task is not None:
+                # Toggle the status
+                self.task_manager.toggle_task_status_by_id(task.id)
+                
+                # If filtering by status, the toggled task may disappear
+                # Adjust the selection if needed
+                if self.filter_status is not None:
                     tasks_after = self.get_filtered_and_sorted_tasks()
                     if self.current_row >= len(tasks_after):
                         self.current_row = max(0, len(tasks_after) - 1)
-        elif key == ord(' '):
-            if tasks and 0 <= self.current_row < len(tasks):
-                # Get the original task index for toggle
-                task_index = self.get_original_index(self.current_row)
-                if task_index >= 0:
-                    # Toggle the status
-                    self.task_manager.toggle_task_status(task_index)
-                    
-                    # If filtering by status, the toggled task may disappear
-                    # Adjust the selection if needed
-                    if self.filter_status is not None:
-                        tasks_after = self.get_filtered_and_sorted_tasks()
-                        if self.current_row >= len(tasks_after):
-                            self.current_row = max(0, len(tasks_after) - 1)
+        elif key == ord('m'):
+            task = self.get_selected_task()
+            if task is not None:
+                self.marked ^= {task.id}
+                if self.current_row < len(tasks) - 1:
+                    self.handle_key(curses.KEY_DOWN)
+        elif key == ord('v'):
+            if self.range_anchor is None:
+                self.range_anchor = self.current_row
+            else:
+                self.end_range()
+        elif key == ord('A'):
+            self.end_range()
+            self.toggle_mark_all()
+        elif key == 27 and (self.marked or self.range_anchor is not None):  # ESC
+            self.clear_selection()
         elif key == ord('t'):
+            self.end_range()
             if self.filter_status == TaskStatus.TODO:
                 self.filter_status = None
             else:
@@ -311,6 +552,7 @@ class TaskTUI:
             self.current_row = 0
             self.top_line = 0
         elif key == ord('f'):
+            self.end_range()
             if self.filter_status == TaskStatus.DONE:
                 self.filter_status = None
             else:
@@ -321,14 +563,67 @@ class TaskTUI:
             self.cycle_sort_mode('priority')
         elif key == ord('c'):
             self.cycle_sort_mode('date')
+        elif key == ord('/'):
+            self.searching = True
+        elif key == ord('H'):
+            self.show_hud = not self.show_hud
+        elif key == 27 and self.search_query:  # ESC
+            self.set_search_query("")
 
-    def draw_screen(self) -> None:
+    def invalidate_screen(self) -> None:
+        """Forget what is on screen so the next draw repaints every row"""
         self.stdscr.clear()
-        max_y, max_x = self.stdscr.getmaxyx()
+        self._screen_rows = {}
+
+    def invalidate_rows(self, *rows: int) -> None:
+        """Mark rows that were drawn over outside draw_screen, e.g. by a prompt"""
+        for row in rows:
+            self._screen_rows.pop(row, None)
+
+    def format_row(self, task: Task, max_x: int) -> Tuple[str, str, str, str, int, str, int]:
+        """Status symbol, title, title padding, date and its x, priority and its x for a task row"""
+        key = (task.id, task.title, task.status, task.priority, max_x)
+        cache = self._row_cache
+        formatted = cache.get(key)
+        if formatted is not None:
+            cache.move_to_end(key)
+            return formatted
+        
+        status_symbol = "[ ]"
+        if task.status == TaskStatus.DONE:
+            status_symbol = "[✓]"
+        
+        date_str = f"({task.creation_day})"
+        priority_str = f"[{task.priority.name}]"
+        
+        # Calculate space available for title
+        space_for_title = max_x - len(status_symbol) - len(date_str) - len(priority_str) - 4
+        title_width = min(len(task.title), space_for_title)
+        
+        # Fill any spaces
+        fill = " " * (space_for_title - len(task.title)) if len(task.title) < space_for_title else ""
+        
+        formatted = (status_symbol, task.title[:title_width], fill,
+                     date_str, max_x - len(date_str) - len(priority_str) - 1,
+                     priority_str, max_x - len(priority_str) - 1)
+        cache[key] = formatted
+        if len(cache) > self.ROW_CACHE_SIZE:
+            cache.popitem(last=False)
+        return formatted
+
+    def compose_rows(self, max_y: int, max_x: int) -> Dict[int, Tuple]:
+        """Describe each screen row as a tuple of (x, text, attr) segments"""
+        rows: Dict[int, List] = {}
         
         # Draw header
         header = "Task Manager"
-        self.stdscr.addstr(0, (max_x - len(header)) // 2, header, curses.A_BOLD)
+        rows[0] = [((max_x - len(header)) // 2, header, curses.A_BOLD)]
+        selected_ids = self.get_selected_ids()
+        if selected_ids:
+            rows[0].append((0, f"{len(selected_ids)} selected", curses.color_pair(5) | curses.A_BOLD))
+        if self.task_manager.loading:
+            loading_status = f"Loading... {len(self.task_manager)} tasks"
+            rows[0].append((max_x - len(loading_status) - 1, loading_status, curses.A_DIM))
         
         # Show filter and sort information
         filter_status = "All Tasks"
@@ -347,67 +642,59 @@ class TaskTUI:
         elif self.sort_mode == SortMode.DATE_DESC:
             sort_status = "Sort: Date ↓"
         
-        self.stdscr.addstr(1, 0, f"Filter: {filter_status}", curses.A_BOLD)
+        rows[1] = [(0, f"Filter: {filter_status}", curses.A_BOLD)]
+        if self.searching or self.search_query:
+            search_status = f"/{self.search_query}" + ("_" if self.searching else "")
+            search_x = len(rows[1][0][1]) + 2
+            rows[1].append((search_x, search_status[:max(0, max_x - search_x - len(sort_status) - 2)], 0))
         if sort_status:
-            self.stdscr.addstr(1, max_x - len(sort_status) - 1, sort_status, curses.A_BOLD)
+            rows[1].append((max_x - len(sort_status) - 1, sort_status, curses.A_BOLD))
         
-        self.stdscr.addstr(2, 0, "=" * (max_x - 1))
+        rows[2] = [(0, "=" * (max_x - 1), 0)]
+        if max_x > 12:
+            rows[2].append((2, f" {self.get_stats_text()} "[:max_x - 5], 0))
         
         # Draw tasks
         visible_tasks = self.get_visible_tasks()
         all_tasks = self.get_filtered_and_sorted_tasks()
         
-        for i, (_, task) in enumerate(visible_tasks):
+        for i, task in enumerate(visible_tasks):
             row_position = i + 3  # Start after header
             
             # Skip if we're outside the visible area
             if row_position >= max_y - 1:
                 break
             
-            status_symbol = "[ ]"
-            if task.status == TaskStatus.DONE:
-                status_symbol = "[✓]"
-            
-            # Format the task line with proper truncation
-            task_line = f"{status_symbol} {task.title}"
-            date_str = f"({task.creation_date.split('T')[0]})"
-            priority_str = f"[{task.priority.name}]"
-            
-            # Calculate space available for title
-            space_for_title = max_x - len(status_symbol) - len(date_str) - len(priority_str) - 4
-            if len(task.title) > space_for_title:
-                task_line = f"{status_symbol} {task.title[:space_for_title-3]}..."
+            status_symbol, title_text, fill, date_str, date_x, priority_str, priority_x = \
+                self.format_row(task, max_x)
             
             # Add each part with appropriate color
             is_selected = self.current_row == i + self.top_line
             attr = curses.A_REVERSE if is_selected else 0
+            if task.id in selected_ids:
+                attr |= curses.color_pair(5) | curses.A_BOLD
             
-            # Status
-            self.stdscr.addstr(row_position, 0, status_symbol, self.get_status_color(task.status) | attr)
-            
-            # Title
             title_x = len(status_symbol) + 1
-            title_width = min(len(task.title), space_for_title)
-            self.stdscr.addstr(row_position, title_x, task.title[:title_width], attr)
-            
-            # Fill any spaces
-            if len(task.title) < space_for_title:
-                self.stdscr.addstr(row_position, title_x + len(task.title), " " * (space_for_title - len(task.title)), attr)
-            
-            # Date
-            date_x = max_x - len(date_str) - len(priority_str) - 1
-            self.stdscr.addstr(row_position, date_x, date_str, attr)
-            
-            # Priority
-            priority_x = max_x - len(priority_str) - 1
-            self.stdscr.addstr(row_position, priority_x, priority_str, self.get_priority_color(task.priority) | attr)
+            row = [
+                (0, status_symbol, self.get_status_color(task.status) | attr),
+                (title_x, title_text, attr),
+            ]
+            if fill:
+                row.append((title_x + len(task.title), fill, attr))
+            row.append((date_x, date_str, attr))
+            row.append((priority_x, priority_str, self.get_priority_color(task.priority) | attr))
+            rows[row_position] = row
         
         # Draw footer with help
-        footer_text = "a:Add  e:Edit  p:Priority  s:Sort Priority  c:Sort Date  Space:Toggle  d:Delete  t:Todo  f:Done  q:Quit"
+        footer_text = "a:Add  e:Edit  p:Priority  s:Sort Priority  c:Sort Date  Space:Toggle  d:Delete  t:Todo  f:Done  /:Search  q:Quit"
+        if self.searching:
+            footer_text = "Type to search  Enter:Done  ESC:Clear  ↑/↓:Move"
+        elif selected_ids:
+            footer_text = "m:Mark  v:Range  A:All  Space:Toggle  p:Priority  d:Delete  ESC:Clear  q:Quit"
         footer_y = max_y - 1
-        self.stdscr.addstr(footer_y, 0, "=" * (max_x - 1))
+        rows[footer_y] = [(0, "=" * (max_x - 1), 0)]
         if len(footer_text) < max_x:
-            self.stdscr.addstr(footer_y, 0, footer_text)
+            rows[footer_y].append((0, footer_text, 0))
         
         # Draw scrollbar if needed
         if len(all_tasks) > max_y - 4:
@@ -415,14 +702,144 @@ class TaskTUI:
             scrollbar_top = 3 + (max_y - 4 - scrollbar_height) * self.top_line // max(1, len(all_tasks) - (max_y - 4))
             for i in range(scrollbar_height):
                 if scrollbar_top + i < max_y - 1:
-                    self.stdscr.addstr(scrollbar_top + i, max_x - 1, "█")
+                    rows.setdefault(scrollbar_top + i, []).append((max_x - 1, "█", 0))
         
-        self.stdscr.refresh()
+        if self.show_hud and max_y > 6:
+            for i, line in enumerate(hud_lines(self.profiler)):
+                text = f" {line} "[:max_x - 1]
+                rows.setdefault(footer_y - 2 + i, []).append((max_x - 1 - len(text), text, curses.A_REVERSE))
+        
+        return {y: tuple(segments) for y, segments in rows.items()}
+
+    def draw_screen(self) -> None:
+        """Repaint only the rows whose text or attributes changed since the last frame"""
+        max_y, max_x = self.stdscr.getmaxyx()
+        if (max_y, max_x) != self._screen_size:
+            self._screen_size = (max_y, max_x)
+            self.invalidate_screen()
+        
+        started = time.perf_counter()
+        self.get_filtered_and_sorted_tasks()
+        viewed = time.perf_counter()
+        view_time, self._view_time = self._view_time, 0.0
+        # A frame answering a key or an external change counts from when that arrived
+        frame_started, self._frame_started = self._frame_started or started, None
+        
+        rows = self.compose_rows(max_y, max_x)
+        for y in range(max_y):
+            segments = rows.get(y, ())
+            if self._screen_rows.get(y) == segments:
+                continue
+            self.stdscr.move(y, 0)
+            self.stdscr.clrtoeol()
+            for x, text, attr in segments:
+                self.stdscr.addstr(y, x, text, attr)
+            self._screen_rows[y] = segments
+        rendered = time.perf_counter()
+        
+        self.stdscr.noutrefresh()
+        curses.doupdate()
+        refreshed = time.perf_counter()
+        
+        self.profiler.record("view", view_time)
+        self.profiler.record("render", rendered - viewed)
+        self.profiler.record("refresh", refreshed - rendered)
+        self.profiler.record("frame", refreshed - frame_started)
+
+    def wake(self) -> None:
+        """Interrupt the main loop wait; safe to call from other threads and signal handlers"""
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except BlockingIOError:
+            pass  # A wakeup is already pending
+
+    def on_resize(self, signum, frame) -> None:
+        self._resized = True
+        self.wake()
+
+    def read_key(self) -> int:
+        """Return the next pending key without blocking, or -1"""
+        self.stdscr.nodelay(True)
+        try:
+            return self.stdscr.getch()
+        finally:
+            self.stdscr.nodelay(False)
+
+    def sync_storage(self) -> None:
+        """Merge in external changes; deferred until a background load has finished"""
+        if self.task_manager.loading:
+            self._sync_pending = True
+            return
+        self._sync_pending = False
+        if self.task_manager.sync():
+            self.clamp_cursor()
+
+    def wait_for_events(self) -> None:
+        watcher_fd = self.watcher.fileno() if self.watcher is not None else None
+        # Without inotify the files are polled, so the wait has to time out
+        timeout = FileWatcher.POLL_INTERVAL if self.watcher is not None and watcher_fd is None else None
+        for selector_key, _ in self.selector.select(timeout):
+            if self._frame_started is None:
+                self._frame_started = time.perf_counter()
+            if selector_key.fd == watcher_fd:
+                if self.watcher.changed():
+                    self.sync_storage()
+            elif selector_key.fd == self._wakeup_r:
+                try:
+                    while os.read(self._wakeup_r, 512):
+                        pass
+                except BlockingIOError:
+                    pass
+                self.dirty = True
+            else:
+                # curses may buffer several keys per read, so drain them all
+                key = self.read_key()
+                while key != -1 and self.running:
+                    self.handle_key(key)
+                    key = self.read_key()
+        
+        if self._resized:
+            self._resized = False
+            size = os.get_terminal_size(sys.stdin.fileno())
+            curses.resizeterm(size.lines, size.columns)
+            self.invalidate_screen()
+        
+        if self.watcher is not None and watcher_fd is None:
+            now = time.monotonic()
+            if now - self._last_poll >= FileWatcher.POLL_INTERVAL:
+                self._last_poll = now
+                if self.watcher.changed():
+                    self.sync_storage()
+        if self._sync_pending:
+            self.sync_storage()
+        if not self.dirty:
+            # Nothing to draw, so the next frame answers something that has yet to arrive
+            self._frame_started = None
 
     def run(self) -> None:
-        while self.running:
-            self.draw_screen()
-            self.handle_input()
+        self.selector.register(sys.stdin.fileno(), selectors.EVENT_READ)
+        self.selector.register(self._wakeup_r, selectors.EVENT_READ)
+        paths = self.task_manager.watched_paths()
+        if paths:
+            self.watcher = FileWatcher(paths)
+            if self.watcher.fileno() is not None:
+                self.selector.register(self.watcher.fileno(), selectors.EVENT_READ)
+        previous_handler = signal.signal(signal.SIGWINCH, self.on_resize)
+        self.task_manager.add_listener(self.wake)
+        try:
+            while self.running:
+                if self.dirty:
+                    self.dirty = False
+                    self.draw_screen()
+                self.wait_for_events()
+        finally:
+            signal.signal(signal.SIGWINCH, previous_handler)
+            self.task_manager.remove_listener(self.wake)
+            self.selector.close()
+            if self.watcher is not None:
+                self.watcher.close()
+            os.close(self._wakeup_r)
+            os.close(self._wakeup_w)
 
 
 def main(stdscr):
@@ -0,0 +1,98 @@
+import ctypes
+import ctypes.util
+import os
+import struct
+from typing import Dict, List, Optional, Set
+
+from task_io import file_signature
+
+# inotify(7) constants
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class FileWatcher:
+    """Tells when any of ``paths`` may have changed.
+
+    On Linux this uses inotify: ``fileno`` is a descriptor that becomes
+    readable on changes, so callers can sleep in a selector. Elsewhere
+    ``fileno`` is None and callers should call ``changed`` on a timer, which
+    then compares each file's size, mtime and inode with the last call.
+    """
+
+    # Seconds between checks when polling
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, paths: List[str]):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self._signatures = {path: file_signature(path) for path in self.paths}
+        self._fd: Optional[int] = None
+        # Watched file names by inotify watch descriptor; the directories are watched, since
+        # saves swap in new files with os.replace
+        self._names: Dict[int, Set[str]] = {}
+        self._start_inotify()
+
+    def _start_inotify(self) -> None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+        directories: Dict[str, Set[str]] = {}
+        for path in self.paths:
+            directories.setdefault(os.path.dirname(path), set()).add(os.path.basename(path))
+        for directory, names in directories.items():
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                os.close(fd)
+                self._names = {}
+                return
+            self._names[wd] = {os.fsencode(name) for name in names}
+        self._fd = fd
+
+    def fileno(self) -> Optional[int]:
+        return self._fd
+
+    def changed(self) -> bool:
+        """Whether a watched file changed since the last call"""
+        if self._fd is not None:
+            return self._read_events()
+        changed = False
+        for path in self.paths:
+            signature = file_signature(path)
+            if signature != self._signatures[path]:
+                self._signatures[path] = signature
+                changed = True
+        return changed
+
+    def _read_events(self) -> bool:
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                start = offset + EVENT_HEADER.size
+                name = data[start:start + length].rstrip(b"\0")
+                if name in self._names.get(wd, ()):
+                    changed = True
+                offset = start + length
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
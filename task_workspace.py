@@ -0,0 +1,164 @@
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional
+
+from task_model import Priority, Task, TaskManager, TaskStats, TaskStatus
+from task_storage import SQLITE_EXTENSIONS
+
+TASK_FILE_EXTENSIONS = (".json",) + SQLITE_EXTENSIONS
+
+# Merge key for each get_ordered sort key
+MERGE_KEYS: Dict[str, Callable[[Task], int]] = {
+    "priority": lambda task: task.priority.value,
+    "creation_date": lambda task: task.created,
+}
+
+
+def workspace_files(paths: Iterable[str]) -> List[str]:
+    """Task files named by ``paths``, with each directory replaced by the task files in it"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith(TASK_FILE_EXTENSIONS) and os.path.isfile(os.path.join(path, name)))
+        else:
+            files.append(path)
+    return files
+
+
+class Workspace:
+    """Several task files, one TaskManager each, presented as one task list.
+
+    Files are loaded in parallel on a thread pool. Reads merge the sorted
+    results of every file with a k-way merge, so each file's indexes do the
+    sorting. Mutations go to the file holding the task, and new tasks to the
+    first file, so editing one project never rewrites another.
+    """
+
+    def __init__(self, paths: List[str], open_manager: Callable[[str], TaskManager],
+                 max_workers: Optional[int] = None):
+        self.paths = paths
+        with ThreadPoolExecutor(max_workers=max_workers or min(32, len(paths))) as pool:
+            self.managers: List[TaskManager] = list(pool.map(open_manager, paths))
+
+    @property
+    def version(self) -> int:
+        # Every manager's version only grows, so the sum changes whenever any of them does
+        return sum(manager.version for manager in self.managers)
+
+    @property
+    def loading(self) -> bool:
+        return any(manager.loading for manager in self.managers)
+
+    @property
+    def archive_loaded(self) -> bool:
+        return all(manager.archive_loaded for manager in self.managers)
+
+    @property
+    def tasks(self) -> List[Task]:
+        return list(chain.from_iterable(manager.tasks for manager in self.managers))
+
+    def __len__(self) -> int:
+        return sum(len(manager) for manager in self.managers)
+
+    def manager_for(self, task_id: str) -> Optional[TaskManager]:
+        """The manager of the file holding ``task_id``"""
+        for manager in self.managers:
+            if manager.get_task(task_id) is not None:
+                return manager
+        return None
+
+    def _by_manager(self, task_ids: Iterable[str]) -> Dict[int, List[str]]:
+        groups: Dict[int, List[str]] = {}
+        for task_id in task_ids:
+            for i, manager in enumerate(self.managers):
+                if manager.get_task(task_id) is not None:
+                    groups.setdefault(i, []).append(task_id)
+                    break
+        return groups
+
+    def _merged(self, lists: List[List[Task]], key: Optional[str], descending: bool) -> List[Task]:
+        if len(lists) == 1:
+            return lists[0]
+        if key is None:
+            # List order is file order, then each file's own order
+            return list(chain.from_iterable(lists))
+        # Ties go to the earlier file, and keep each file's order among themselves
+        return list(heapq.merge(*lists, key=MERGE_KEYS[key], reverse=descending))
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        manager = self.manager_for(task_id)
+        return manager.get_task(task_id) if manager is not None else None
+
+    def get_tasks(self, status: Optional[TaskStatus] = None) -> List[Task]:
+        return list(chain.from_iterable(manager.get_tasks(status) for manager in self.managers))
+
+    def get_ordered(self, status: Optional[TaskStatus] = None, key: Optional[str] = None,
+                    descending: bool = False) -> List[Task]:
+        return self._merged([manager.get_ordered(status, key, descending) for manager in self.managers],
+                            key, descending)
+
+    def search(self, query: str, status: Optional[TaskStatus] = None, key: Optional[str] = None,
+               descending: bool = False) -> List[Task]:
+        return self._merged([manager.search(query, status, key, descending) for manager in self.managers],
+                            key, descending)
+
+    def stats(self, now: Optional[datetime] = None) -> TaskStats:
+        moment = now or datetime.now()
+        stats = [manager.stats(moment) for manager in self.managers]
+        return sum(stats[1:], stats[0])
+
+    def add_task(self, title: str, priority: Priority) -> Task:
+        return self.managers[0].add_task(title, priority)
+
+    def toggle_task_status_by_id(self, task_id: str) -> None:
+        self.toggle_tasks_status_by_id([task_id])
+
+    def update_task_title_by_id(self, task_id: str, new_title: str) -> None:
+        manager = self.manager_for(task_id)
+        if manager is not None:
+            manager.update_task_title_by_id(task_id, new_title)
+
+    def update_task_priority_by_id(self, task_id: str, new_priority: Priority) -> None:
+        self.update_tasks_priority_by_id([task_id], new_priority)
+
+    def delete_task_by_id(self, task_id: str) -> None:
+        self.delete_tasks_by_id([task_id])
+
+    def toggle_tasks_status_by_id(self, task_ids: Iterable[str]) -> None:
+        for i, ids in self._by_manager(task_ids).items():
+            self.managers[i].toggle_tasks_status_by_id(ids)
+
+    def update_tasks_priority_by_id(self, task_ids: Iterable[str], new_priority: Priority) -> None:
+        for i, ids in self._by_manager(task_ids).items():
+            self.managers[i].update_tasks_priority_by_id(ids, new_priority)
+
+    def delete_tasks_by_id(self, task_ids: Iterable[str]) -> None:
+        for i, ids in self._by_manager(task_ids).items():
+            self.managers[i].delete_tasks_by_id(ids)
+
+    def load_archive(self) -> None:
+        for manager in self.managers:
+            manager.load_archive()
+
+    def sync(self) -> bool:
+        # Not any(), which would stop at the first file with changes
+        return True in [manager.sync() for manager in self.managers]
+
+    def watched_paths(self) -> List[str]:
+        return list(chain.from_iterable(manager.watched_paths() for manager in self.managers))
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        for manager in self.managers:
+            manager.add_listener(callback)
+
+    def remove_listener(self, callback: Callable[[], None]) -> None:
+        for manager in self.managers:
+            manager.remove_listener(callback)
+
+    def close(self) -> None:
+        for manager in self.managers:
+            manager.close()